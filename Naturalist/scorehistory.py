@@ -0,0 +1,218 @@
+"""Performance history for scorer.py
+
+Every scorer.py run appends its seeds to a JSONL history file, one line per
+seed, tagged with the git revision of the tree, the naturalist class, the map,
+animal and tree parameters, the JVM options and how the seeds were run (fresh
+JVMs, a batch JVM or the timed launcher of breakdown). Two revisions can then
+be compared seed by seed to catch a slowdown in the commit that caused it.
+
+From the command line:
+    python scorehistory.py
+        Lists the revisions in the history with their seed counts. Seeds run with
+        local changes to the sources are listed under REV-dirty.
+    python scorehistory.py BASE [REV] [naturalist=X] [alpha=0.05] [top=5]
+        Compares REV (by default the latest revision recorded) against BASE and
+        flags significant regressions in time or moves, listing the seeds whose
+        numbers went up the most. Exits with 1 when there is a regression."""
+from __future__ import print_function
+import os
+import sys
+import json
+import datetime
+import subprocess
+import scorestats
+
+HISTORY_FILE = '.scorehistory.jsonl'
+# Fields kept for every seed, on top of the revision and run stamp
+FIELDS = ['naturalist', 'map', 'seed', 'animals', 'trees', 'mode', 'success', 'score', 'moves', 'time', 'wall']
+# Fields compared between revisions; for both of them lower is better
+COMPARE_FIELDS = ['time', 'moves']
+# Fields a quick bench clusters the seeds on
+QUICK_FIELDS = ['time', 'moves', 'score']
+
+def revision():
+    """Returns (revision, dirty): the git revision of the working tree, and whether the
+    tracked files under the current directory have local changes. The compiled classes
+    in bin are left out, as scorer.py rebuilds them whenever the sources change.
+    """
+    try:
+        with open(os.devnull, 'w') as null:
+            out = subprocess.check_output(['git', 'describe', '--always'], stderr=null)
+            dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD', '--', '.', ':(exclude)bin'],
+                                    stdout=null, stderr=null) == 1
+        return (out.decode('utf-8').strip(), dirty)
+    except (OSError, subprocess.CalledProcessError):
+        return ('unknown', False)
+
+def entry_revision(e):
+    """Returns the revision e was run at, marked -dirty when the sources had local changes"""
+    return e['revision'] + ('-dirty' if e.get('dirty') else '')
+
+def record(records, path=HISTORY_FILE, rev=None, jvmopts=(), quick=False):
+    """Passes records through, appending every seed that ran to the history file path.
+    Records resumed from a checkpoint or taken from the result cache were measured by an
+    earlier run, possibly of another revision, so they are not appended.
+    With quick, the entries are marked as coming from a quick bench, which is never used
+    as the baseline of another one.
+    """
+    dirty = False
+    if rev is None:
+        (rev, dirty) = revision()
+    stamp = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    with open(path, 'a') as f:
+        for r in records:
+            if 'error' not in r and not r.get('resumed') and not r.get('cached'):
+                entry = dict((name, r.get(name)) for name in FIELDS)
+                entry.update({'revision': rev, 'dirty': dirty, 'run': stamp, 'jvmopts': ' '.join(jvmopts),
+                              'quick': quick})
+                f.write(json.dumps(entry, sort_keys=True) + '\n')
+                f.flush()
+            yield r
+
+def load(path=HISTORY_FILE):
+    """Returns the entries in the history file path, skipping any line that was cut short"""
+    entries = []
+    if not os.path.isfile(path):
+        return entries
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                pass
+    return entries
+
+def revisions(entries):
+    """Returns (revision, seeds) pairs in the order the revisions were first recorded"""
+    counts = {}
+    order = []
+    for e in entries:
+        rev = entry_revision(e)
+        if rev not in counts:
+            counts[rev] = 0
+            order.append(rev)
+        counts[rev] += 1
+    return [(rev, counts[rev]) for rev in order]
+
+def group_key(e):
+    return (e['naturalist'], e['animals'], e['trees'], e['map'] or '', e.get('mode') or '', e.get('jvmopts', ''))
+
+def select(entries, rev):
+    """Returns {group key: {seed: entry}} for the successful seeds of revision rev, as named
+    by entry_revision. A seed run more than once keeps its latest entry.
+    """
+    groups = {}
+    for e in entries:
+        if entry_revision(e) == rev and e['success']:
+            groups.setdefault(group_key(e), {})[e['seed']] = e
+    return groups
+
+def latest_run(entries, key):
+    """Returns {seed: entry} for the successful seeds of the latest run of group key that
+    was not a quick bench, so that every seed comes from the same run
+    """
+    runs = {}
+    for e in entries:
+        if group_key(e) == key and not e.get('quick'):
+            runs.setdefault(e['run'], {})
+            if e['success']:
+                runs[e['run']][e['seed']] = e
+    return runs[max(runs)] if runs else {}
+
+def quick_strata(seeds, k):
+    """Picks about k representative seeds out of seeds ({seed: entry}) for a quick bench.
+    The seeds are clustered on their past QUICK_FIELDS, each scaled to unit spread, into
+    k/2 clusters and the two seeds nearest the centre of each cluster are picked.
+    Returns a list of (cluster size, [picked seeds]) pairs.
+    """
+    order = sorted(seeds)
+    scaled = []
+    for name in QUICK_FIELDS:
+        xs = [seeds[seed][name] for seed in order]
+        (m, sd) = (scorestats.mean(xs), scorestats.stdev(xs) or 1.0)
+        scaled.append([(x-m)/sd for x in xs])
+    points = list(zip(*scaled))
+    strata = []
+    for (centre, members) in scorestats.kmeans(points, max(1, k//2)):
+        members.sort(key=lambda i: sum((a-b)**2 for (a, b) in zip(points[i], centre)))
+        strata.append((len(members), [order[i] for i in members[:2]]))
+    return strata
+
+def compare(entries, base, rev, alpha=0.05, top=5):
+    """Pairs the seeds the two revisions have in common within each group and tests
+    every field in COMPARE_FIELDS for a shift with the signed-rank test.
+    Returns a list of (group key, field, paired seeds, base mean, rev mean, median delta,
+    p value, regressed, [(seed, base value, rev value)] for the top seeds that went up most).
+    """
+    old = select(entries, base)
+    new = select(entries, rev)
+    report = []
+    for key in sorted(set(old) & set(new)):
+        seeds = sorted(set(old[key]) & set(new[key]))
+        if not seeds:
+            continue
+        for field in COMPARE_FIELDS:
+            pairs = [(seed, old[key][seed][field], new[key][seed][field]) for seed in seeds]
+            deltas = [b - a for (seed, a, b) in pairs]
+            (z, p) = scorestats.signed_rank_test(deltas)
+            regressed = z > 0 and p < alpha
+            worst = sorted([x for x in pairs if x[2] > x[1]], key=lambda x: x[1] - x[2])[:top]
+            report.append((key, field, len(pairs), scorestats.mean([a for (s, a, b) in pairs]),
+                           scorestats.mean([b for (s, a, b) in pairs]), scorestats.median(deltas),
+                           p, regressed, worst))
+    return report
+
+def format_group(key):
+    (naturalist, animals, trees, simmap, mode, jvmopts) = key
+    text = '%s animals=%d trees=%d map=%s %s' % (naturalist, animals, trees, simmap or 'random', mode or 'unknown')
+    return text + (' ' + jvmopts if jvmopts else '')
+
+if __name__ == '__main__':
+    path = HISTORY_FILE
+    naturalist = ''
+    alpha = 0.05
+    top = 5
+    revs = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('file='):
+            path = arg.split('=')[1]
+        elif arg.startswith('naturalist='):
+            naturalist = arg.split('=')[1]
+        elif arg.startswith('alpha='):
+            alpha = float(arg.split('=')[1])
+        elif arg.startswith('top='):
+            top = int(arg.split('=')[1])
+        else:
+            revs.append(arg)
+
+    entries = load(path)
+    if naturalist != '':
+        entries = [e for e in entries if e['naturalist'] == naturalist]
+    known = revisions(entries)
+    if len(revs) == 0:
+        for (rev, n) in known:
+            print('%s\t%d seeds' % (rev, n))
+        sys.exit(0)
+    base = revs[0]
+    rev = revs[1] if len(revs) > 1 else known[-1][0] if known else ''
+    missing = [r for r in [base, rev] if r not in dict(known)]
+    if missing:
+        print("ERROR: no history for revision " + ', '.join(missing))
+        sys.exit(2)
+
+    report = compare(entries, base, rev, alpha, top)
+    if not report:
+        print("No seeds in common between " + base + " and " + rev)
+        sys.exit(2)
+    print("Comparing " + rev + " against " + base)
+    regressions = 0
+    for (key, field, n, a, b, delta, p, regressed, worst) in report:
+        change = (b - a)/a*100 if a else 0.0
+        print("%s, %s: %d seeds, %.2f -> %.2f (%+.2f%%), median delta %+.2f, p=%.4f%s" %
+              (format_group(key), field, n, a, b, change, delta, p, '  REGRESSION' if regressed else ''))
+        if regressed:
+            regressions += 1
+            for (seed, x, y) in worst:
+                print("    Seed %d: %g -> %g (%+g)" % (seed, x, y, y - x))
+    print("Regressions: " + str(regressions))
+    sys.exit(1 if regressions else 0)
@@ -1,17 +1,1398 @@
+"""Runs a naturalist through the Simulator on many seeds and reports the results.
+
+From the command line:  python scorer.py MyNaturalist num=100 jobs=4 ...
+From Python, run() and run_tasks() yield one record (a dictionary) per seed."""
+from __future__ import print_function
 import os
+import sys
+import re
 import optparse
+import subprocess
+import threading
+import hashlib
+import json
+import math
+import signal
+import atexit
+import functools
+import socket
+import collections
+from time import sleep
+import multiprocessing
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer as timer
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+import scorestats
+import scoretable
+import scorehistory
+
+CLASSPATH = os.pathsep.join(['bin', 'classes'])
+# Naturalist sources and where they are compiled to
+SOURCE_DIR = 'src'
+BUILD_DIR = 'bin'
+# A top-level type declaration, e.g. "public class MyNaturalist extends Naturalist {"
+CLASS_DECL = re.compile(r'^(public\s+)?(?:(?:abstract|final|strictfp)\s+)*(?:class|interface|enum)\s+(\w+)', re.M)
+# Printed by BatchSimulator after every run it is handed
+BATCH_MARKER = 'Batch run finished.'
+# Printed by TimedSimulator as soon as the JVM reaches main
+START_MARKER = 'Simulator started.'
+# JVM option that makes the JVM log every collection to stdout, where parse_output finds it
+GC_OPTION = '-Xlog:gc:stdout'
+
+def sim_args(naturalist, seed, animals, trees, simmap):
+    """Returns the Simulator arguments for one seed"""
+    simscript = [naturalist]
+    simscript.append('--headless')
+    simscript.append('--seed='+str(seed))
+    simscript.append('--nanimals='+str(animals))
+    simscript.append('--ntrees='+str(trees))
+    if (simmap != ''):
+        simscript.append('--map='+simmap)
+    return simscript
+
+def java_command(mainclass, jvmopts=()):
+    """Returns the argument list that starts mainclass in a JVM with the extra options jvmopts"""
+    return ['java'] + list(jvmopts) + ['-cp', CLASSPATH, mainclass]
+
+def sim_command(simargs, jvmopts=(), mainclass='Simulator'):
+    """Returns the argument list that runs one seed in a fresh JVM"""
+    return java_command(mainclass, jvmopts) + simargs
+
+def parse_output(f, gc=False):
+    """Parses the Simulator output of a single seed.
+    Returns a dictionary with the success flag, score, moves and time of the seed.
+    With gc, the JVM's GC log lines are expected in the same output and the number of
+    collections, their total pause time and the longest pause are added as well.
+    """
+    result = {'success': False, 'score': 0, 'moves': 0, 'time': 0}
+    if gc:
+        result.update({'gccount': 0, 'gcpause': 0.0, 'gcmax': 0.0})
+    for line in f:
+        line = line.strip()
+        if gc and 'GC(' in line and 'Pause' in line and line.endswith('ms'):
+            # e.g. [0.212s][info][gc] GC(3) Pause Young (Normal) (G1 Evacuation Pause) 24M->3M(256M) 1.234ms
+            pause = float(line.split()[-1][:-2])
+            result['gccount'] += 1
+            result['gcpause'] += pause
+            result['gcmax'] = max(result['gcmax'], pause)
+            continue
+        if line.startswith("Mission accomplished!"):
+            result['success'] = True
+        if line.startswith('Score:'):
+            (k,v) = line.split()
+            result['score'] = int(v.strip())
+        if line.startswith('Moves:'):
+            (k,v) = line.split()
+            result['moves'] = int(v.strip())
+        if line.startswith('Time elapsed:'):
+            (k1,k2,v,k3) = line.split()
+            result['time'] = int(v.strip())
+    return result
+
+def wait_usage(proc):
+    """Waits for proc to exit and returns (user ms, sys ms, peak RSS KB) of the child,
+    or None where the platform has no wait4.
+    """
+    if not hasattr(os, 'wait4'):
+        proc.wait()
+        return None
+    (pid, status, ru) = os.wait4(proc.pid, 0)
+    proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    # ru_maxrss is in kilobytes on Linux but in bytes on OS X
+    rss = ru.ru_maxrss // 1024 if sys.platform == 'darwin' else ru.ru_maxrss
+    return (ru.ru_utime*1000, ru.ru_stime*1000, rss)
+
+def proc_usage(pid):
+    """Returns (user ms, sys ms, peak RSS KB) so far of a running process from /proc,
+    or None where /proc is not available.
+    """
+    try:
+        with open('/proc/%d/stat' % pid) as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/%d/status' % pid) as f:
+            hwm = [line.split()[1] for line in f if line.startswith('VmHWM:')]
+    except (IOError, OSError):
+        return None
+    tick = 1000.0/os.sysconf('SC_CLK_TCK')
+    return (int(fields[11])*tick, int(fields[12])*tick, int(hwm[0]) if hwm else 0)
+
+def add_usage(result, wall, usage):
+    """Records the harness-side wall time and the child's CPU time and peak RSS in result"""
+    result['wall'] = wall*1000
+    if usage is not None:
+        (result['cpuuser'], result['cpusys'], result['rss']) = usage
+
+# Processes started by start_group, until they are seen to have been waited for
+LIVE = set()
+LIVE_LOCK = threading.Lock()
+
+def start_group(cmd, **kwargs):
+    """Starts cmd in a process group of its own, so kill_tree can reach everything it starts.
+    Being in a group of its own, it no longer gets the terminal's Ctrl-C, so the process is
+    remembered for kill_all.
+    """
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+    elif sys.version_info[0] >= 3:
+        kwargs['start_new_session'] = True
+    else:
+        kwargs['preexec_fn'] = os.setsid
+    proc = subprocess.Popen(cmd, universal_newlines=True, **kwargs)
+    with LIVE_LOCK:
+        for p in [p for p in LIVE if p.returncode is not None]:
+            LIVE.discard(p)
+        LIVE.add(proc)
+    return proc
+
+def kill_all():
+    """Kills every process tree started by start_group that has not been waited for yet.
+    Runs when the scorer stops early, as on Ctrl-C, and at exit.
+    """
+    with LIVE_LOCK:
+        procs = [p for p in LIVE if p.returncode is None]
+        LIVE.clear()
+    for proc in procs:
+        kill_tree(proc)
+
+atexit.register(kill_all)
+
+def kill_tree(proc):
+    """Kills a process started by start_group along with all of its children"""
+    try:
+        if os.name == 'nt':
+            with open(os.devnull, 'w') as devnull:
+                subprocess.call(['taskkill', '/F', '/T', '/PID', str(proc.pid)], stdout=devnull, stderr=devnull)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+class Watchdog(object):
+    """Kills a process tree if it is still running after timeout seconds (0 means never)"""
+
+    def __init__(self, proc, timeout):
+        self.proc = proc
+        self.fired = False
+        self.alarm = None
+        if timeout > 0:
+            self.alarm = threading.Timer(timeout, self.fire)
+            self.alarm.daemon = True
+            self.alarm.start()
+
+    def fire(self):
+        self.fired = True
+        kill_tree(self.proc)
+
+    def cancel(self):
+        if self.alarm is not None:
+            self.alarm.cancel()
+
+def which(name):
+    """Returns the full path of the program name on the PATH, or None"""
+    for d in os.environ.get('PATH', '').split(os.pathsep):
+        path = os.path.join(d, name)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+def physical_cores():
+    """Returns the logical CPUs this process may run on, grouped by physical core"""
+    if hasattr(os, 'sched_getaffinity'):
+        allowed = sorted(os.sched_getaffinity(0))
+    else:
+        allowed = list(range(cpu_count()))
+    cores = {}
+    for cpu in allowed:
+        try:
+            with open('/sys/devices/system/cpu/cpu%d/topology/thread_siblings_list' % cpu) as f:
+                core = f.read().strip()
+        except (IOError, OSError):
+            core = str(cpu)
+        cores.setdefault(core, []).append(cpu)
+    return sorted(cores.values())
+
+class CorePinner(object):
+    """Gives every pool thread a physical core of its own and pins the processes it starts there.
+    Uses taskset where it exists, so every JVM thread inherits the pinning, and
+    otherwise sets the affinity of the process right after it starts.
+    """
+
+    def __init__(self):
+        self.cores = physical_cores()
+        self.free = list(self.cores)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.taskset = which('taskset')
+
+    def cpus(self):
+        if not hasattr(self.local, 'cpus'):
+            with self.lock:
+                self.local.cpus = self.free.pop(0) if self.free else None
+        return self.local.cpus
+
+    def command(self, cmd):
+        if self.taskset and self.cpus():
+            return [self.taskset, '-c', ','.join(str(c) for c in self.cpus())] + cmd
+        return cmd
+
+    def pin(self, proc):
+        if not self.taskset and self.cpus() and hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(proc.pid, self.cpus())
+            except OSError:
+                pass
+
+def failed_result(error):
+    """Returns the result of a seed that could not be run at all"""
+    result = parse_output([])
+    result['error'] = error
+    return result
+
+def run_seed(job, timeout=0, jvmopts=(), pinner=None, timed=False):
+    """Runs a single seed, parsing the Simulator output straight off its stdout pipe.
+    A seed still running after timeout seconds is killed and marked as timed out.
+    With pinner, the Simulator is pinned to the calling thread's core.
+    With timed, the seed runs under TimedSimulator and the time from launch until
+    main was reached is recorded as its startup.
+    Returns the seed together with its parsed result.
+    """
+    (seed, simargs) = job
+    cmd = sim_command(simargs, jvmopts, 'TimedSimulator' if timed else 'Simulator')
+    if pinner:
+        cmd = pinner.command(cmd)
+    start = timer()
+    try:
+        proc = start_group(cmd, stdout=subprocess.PIPE)
+    except OSError as e:
+        return (seed, failed_result(str(e)))
+    if pinner:
+        pinner.pin(proc)
+    watchdog = Watchdog(proc, timeout)
+    started = []
+    def after_marker(lines):
+        for line in lines:
+            if not started and line.strip() == START_MARKER:
+                started.append(timer())
+                continue
+            yield line
+    result = parse_output(after_marker(iter(proc.stdout.readline, '')), GC_OPTION in jvmopts)
+    proc.stdout.close()
+    usage = wait_usage(proc)
+    watchdog.cancel()
+    add_usage(result, timer()-start, usage)
+    if started:
+        result['startup'] = (started[0]-start)*1000
+    if watchdog.fired:
+        result['timeout'] = True
+    elif proc.returncode != 0 and not result['success']:
+        result['error'] = 'exit status ' + str(proc.returncode)
+    return (seed, result)
+
+class RetryRunner(object):
+    """Reruns seeds that hit an infrastructure failure (the Simulator could not be
+    started or died without a result) up to retries more times. Timeouts are not retried.
+    """
+
+    def __init__(self, runner, retries):
+        self.runner = runner
+        self.retries = retries
+
+    def __call__(self, job):
+        (seed, result) = self.runner(job)
+        attempt = 0
+        while 'error' in result and attempt < self.retries:
+            attempt += 1
+            (seed, result) = self.runner(job)
+        if attempt > 0:
+            result['retries'] = attempt
+        return (seed, result)
+
+class BatchJVM(object):
+    """A long-lived JVM running BatchSimulator, fed one seed at a time over stdin.
+    The first run of every JVM is marked cold, later runs are warm.
+    CPU time is the JVM's usage during the run; peak RSS is the JVM's peak so far.
+    """
+
+    def __init__(self, timeout=0, jvmopts=(), pinner=None):
+        self.proc = None
+        self.runs = 0
+        self.timeout = timeout
+        self.jvmopts = jvmopts
+        self.pinner = pinner
+
+    def start(self):
+        cmd = java_command('BatchSimulator', self.jvmopts)
+        if self.pinner:
+            cmd = self.pinner.command(cmd)
+        self.proc = start_group(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        if self.pinner:
+            self.pinner.pin(self.proc)
+        self.runs = 0
+
+    def run(self, simargs):
+        """Runs one seed and returns its parsed result.
+        If the seed times out or the JVM dies, the JVM is replaced before the next seed.
+        """
+        if self.proc is None or self.proc.poll() is not None:
+            try:
+                self.start()
+            except OSError as e:
+                return failed_result(str(e))
+        before = proc_usage(self.proc.pid)
+        start = timer()
+        watchdog = Watchdog(self.proc, self.timeout)
+        finished = []
+        def until_marker(lines):
+            for line in lines:
+                if line.strip() == BATCH_MARKER:
+                    finished.append(True)
+                    return
+                yield line
+        try:
+            self.proc.stdin.write(' '.join(simargs) + '\n')
+            self.proc.stdin.flush()
+            result = parse_output(until_marker(iter(self.proc.stdout.readline, '')), GC_OPTION in self.jvmopts)
+        except (IOError, OSError) as e:
+            result = failed_result(str(e))
+        watchdog.cancel()
+        wall = timer()-start
+        after = proc_usage(self.proc.pid)
+        usage = None
+        if before is not None and after is not None:
+            usage = (after[0]-before[0], after[1]-before[1], after[2])
+        add_usage(result, wall, usage)
+        result['cold'] = self.runs == 0
+        self.runs += 1
+        if watchdog.fired:
+            result['timeout'] = True
+        elif not finished and 'error' not in result:
+            result['error'] = 'batch JVM exited'
+        if not finished:
+            kill_tree(self.proc)
+            self.proc.wait()
+        return result
+
+    def close(self, grace=5.0):
+        """Lets the JVM finish on its own, killing it if it has not exited after grace seconds"""
+        if self.proc is not None and self.proc.poll() is None:
+            try:
+                self.proc.stdin.close()
+            except (IOError, OSError):
+                pass
+            start = timer()
+            while self.proc.poll() is None and timer() - start < grace:
+                sleep(0.05)
+            if self.proc.poll() is None:
+                kill_tree(self.proc)
+                self.proc.wait()
+
+class BatchRunner(object):
+    """Runs seeds on persistent JVMs, one per pool thread"""
+
+    def __init__(self, timeout=0, jvmopts=(), pinner=None):
+        self.timeout = timeout
+        self.jvmopts = jvmopts
+        self.pinner = pinner
+        self.local = threading.local()
+        self.jvms = []
+        self.lock = threading.Lock()
+
+    def __call__(self, job):
+        (seed, simargs) = job
+        jvm = getattr(self.local, 'jvm', None)
+        if jvm is None:
+            jvm = self.local.jvm = BatchJVM(self.timeout, self.jvmopts, self.pinner)
+            with self.lock:
+                self.jvms.append(jvm)
+        return (seed, jvm.run(simargs))
+
+    def close(self):
+        for jvm in self.jvms:
+            jvm.close()
+
+def file_hash(path, h=None):
+    """Feeds the name and contents of a file into h (a new sha1 if not given) and returns it"""
+    if h is None:
+        h = hashlib.sha1()
+    h.update(path.encode('utf-8'))
+    with open(path, 'rb') as f:
+        h.update(f.read())
+    return h
+
+def declared_class(path):
+    """Returns (name, public) for the first top-level class declared in the Java source
+    at path, or None if it declares none
+    """
+    with open(path, 'r') as f:
+        text = re.sub(r'/\*.*?\*/|//[^\n]*', '', f.read(), flags=re.S)
+    m = CLASS_DECL.search(text)
+    if m is None:
+        return None
+    return (m.group(2), m.group(1) is not None)
+
+def stale_sources(srcdir=SOURCE_DIR, builddir=BUILD_DIR):
+    """Returns the .java files in srcdir whose class has no class file in builddir or
+    was changed after it was written.
+    A file whose public class is named differently from the file (JPS.java holds
+    another MyNaturalist) is never returned, as javac will not compile it.
+    """
+    stale = []
+    if not os.path.isdir(srcdir):
+        return stale
+    for name in sorted(os.listdir(srcdir)):
+        if not name.endswith('.java'):
+            continue
+        path = os.path.join(srcdir, name)
+        decl = declared_class(path)
+        if decl is None or (decl[1] and decl[0] != name[:-len('.java')]):
+            continue
+        target = os.path.join(builddir, decl[0] + '.class')
+        if not os.path.isfile(target) or os.path.getmtime(path) > os.path.getmtime(target):
+            stale.append(path)
+    return stale
+
+def compile_sources(paths, srcdir=SOURCE_DIR, builddir=BUILD_DIR):
+    """Compiles paths with javac into builddir against the rest of the classpath.
+    Sources they depend on that are stale as well are picked up from srcdir.
+    Returns javac's exit status and output.
+    """
+    cmd = ['javac', '-cp', CLASSPATH, '-sourcepath', srcdir, '-d', builddir] + list(paths)
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    except OSError as e:
+        return (None, str(e))
+    output = proc.communicate()[0]
+    return (proc.returncode, output)
+
+def class_hash():
+    """Returns a hash of every compiled class on the classpath"""
+    h = hashlib.sha1()
+    paths = []
+    for d in CLASSPATH.split(os.pathsep):
+        for (root, dirs, files) in os.walk(d):
+            paths.extend(os.path.join(root, name) for name in files if name.endswith('.class'))
+    for path in sorted(paths):
+        file_hash(path, h)
+    return h.hexdigest()
+
+class ResultCache(object):
+    """On-disk store of seed results, one small JSON file per result.
+    Results are keyed on the compiled code, the run mode, the Simulator arguments
+    and the contents of the map file if there is one, so anything that could change the outcome of a seed also changes its key.
+    When the store grows past maxsize bytes the least recently used results are evicted.
+    """
+
+    def __init__(self, path, codehash, maxsize):
+        self.path = path
+        self.codehash = codehash
+        self.maxsize = maxsize
+        self.maphashes = {}
+        self.lock = threading.Lock()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def key(self, mode, simargs):
+        h = hashlib.sha1()
+        h.update((self.codehash + ' ' + mode + ' ' + ' '.join(simargs)).encode('utf-8'))
+        for arg in simargs:
+            if arg.startswith('--map='):
+                simmap = arg[len('--map='):]
+                if simmap not in self.maphashes and os.path.isfile(simmap):
+                    self.maphashes[simmap] = file_hash(simmap).hexdigest()
+                h.update(self.maphashes.get(simmap, '').encode('utf-8'))
+        return os.path.join(self.path, h.hexdigest() + '.json')
+
+    def get(self, mode, simargs):
+        path = self.key(mode, simargs)
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        os.utime(path, None)
+        return result
+
+    def put(self, mode, simargs, result):
+        path = self.key(mode, simargs)
+        tmp = path + '.' + str(threading.current_thread().ident)
+        with open(tmp, 'w') as f:
+            json.dump(result, f)
+        if os.path.exists(path):
+            os.remove(tmp)
+        else:
+            os.rename(tmp, path)
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        size = sum(e[1] for e in entries)
+        for (mtime, nbytes, path) in sorted(entries):
+            if size <= self.maxsize:
+                break
+            os.remove(path)
+            size -= nbytes
+
+class CachedRunner(object):
+    """Serves seeds from a ResultCache, handing the rest to the wrapped runner"""
+
+    def __init__(self, cache, runner, mode):
+        self.cache = cache
+        self.runner = runner
+        self.mode = mode
+
+    def __call__(self, job):
+        (seed, simargs) = job
+        result = self.cache.get(self.mode, simargs)
+        if result is None:
+            (seed, result) = self.runner(job)
+            if result['success']:
+                self.cache.put(self.mode, simargs, result)
+        else:
+            result['cached'] = True
+        return (seed, result)
+
+# Per-seed measurements shown in the statistics table, with their labels
+STAT_ROWS = [('score', 'Score'), ('moves', 'Moves'), ('time', 'Time'), ('wall', 'Wall'), ('startup', 'Start'),
+             ('cpuuser', 'User'), ('cpusys', 'Sys'), ('rss', 'RSS KB'),
+             ('gccount', 'GCs'), ('gcpause', 'GC ms'), ('gcmax', 'GC max')]
+
+def print_stats(results):
+    """Prints the per-seed spread of score, moves, time and resource usage,
+    the confidence interval of the mean time and the seeds whose time is an outlier.
+    """
+    done = [(seed, r) for (seed, r) in results if r['success']]
+    times = [r['time'] for (seed, r) in done]
+    (lo, hi) = scorestats.bootstrap_ci(times)
+    print("Mean Time: %.2f ms (95%% CI: %.2f - %.2f)" % (scorestats.mean(times), lo, hi))
+    print("%-6s %10s %10s %10s %10s %10s %12s" % ('', 'Median', 'P90', 'P99', 'Std Dev', 'Max', 'Total'))
+    for (name, label) in STAT_ROWS:
+        xs = [r[name] for (seed, r) in done if name in r]
+        if len(xs) == 0:
+            continue
+        st = scorestats.summary(xs)
+        print("%-6s %10.1f %10.1f %10.1f %10.1f %10.1f %12.1f" %
+              (label, st['median'], st['p90'], st['p99'], st['stdev'], st['max'], sum(xs)))
+    slow = scorestats.outliers([(seed, r['time']) for (seed, r) in done])
+    print("Outlier Seeds: " + str(len(slow)))
+    for (seed, t) in slow:
+        print("Simulation " + str(seed) + " - Time: " + str(t))
+
+def print_breakdown(results):
+    """Splits the harness wall time of the successful seeds into JVM startup (when it was
+    measured), the time the Simulator reports and everything else, such as map generation
+    and teardown, and prints how much of the wall time is overhead outside the timed run.
+    """
+    done = [r for (seed, r) in results if r['success'] and 'wall' in r]
+    wall = sum(r['wall'] for r in done)
+    if wall <= 0:
+        return
+    startup = sum(r.get('startup', 0.0) for r in done)
+    run = sum(r['time'] for r in done)
+    print("%-10s %10s %10s %8s" % ('', 'Mean ms', 'Total ms', 'Share'))
+    for (label, total) in [('Startup', startup), ('Simulator', run), ('Other', wall-startup-run), ('Wall', wall)]:
+        print("%-10s %10.1f %10.1f %7.1f%%" % (label, total/len(done), total, 100*total/wall))
+    if not any('startup' in r for r in done):
+        print("JVM startup was not measured separately, so it is counted under Other")
+    print("Overhead: %.1f%% of the wall time is spent outside the Simulator's timed run" % (100*(wall-run)/wall))
+
+def print_comparison(names, pairs):
+    """Prints the paired time difference (B - A) between two naturalists run on the same seeds,
+    with a signed-rank test and the seeds where one side wins by an outlying margin.
+    """
+    pairs = [(seed, a, b) for (seed, a, b) in pairs if a['success'] and b['success']]
+    deltas = [b['time'] - a['time'] for (seed, a, b) in pairs]
+    (lo, hi) = scorestats.bootstrap_ci(deltas)
+    (z, p) = scorestats.signed_rank_test(deltas)
+    print("Comparison: " + names[1] + " - " + names[0] + " over " + str(len(deltas)) + " paired seeds")
+    for (name, side) in zip(names, [1, 2]):
+        times = [pair[side]['time'] for pair in pairs]
+        print("  %s - Mean Time: %.2f, Median Time: %.2f" % (name, scorestats.mean(times), scorestats.median(times)))
+    print("  Mean Delta: %.2f ms (95%% CI: %.2f - %.2f)" % (scorestats.mean(deltas), lo, hi))
+    print("  Median Delta: %.2f ms" % scorestats.median(deltas))
+    print("  %s Faster: %d, %s Faster: %d, Ties: %d" % (names[0], len([d for d in deltas if d > 0]),
+                                                    names[1], len([d for d in deltas if d < 0]),
+                                                    len([d for d in deltas if d == 0])))
+    print("  Signed-Rank Test: z = %.2f, p = %.4f%s" % (z, p, ' (significant)' if p < 0.05 else ''))
+    big = scorestats.outliers([(seed, b['time'] - a['time']) for (seed, a, b) in pairs])
+    for (seed, d) in big:
+        print("  Simulation " + str(seed) + " - " + (names[0] if d > 0 else names[1]) + " wins by " + str(abs(d)) + " ms")
+
+def seed_task(naturalist, seed, animals=40, trees=70, simmap=''):
+    """Returns the description of one seed to simulate, as used by run_tasks"""
+    return {'naturalist': naturalist, 'seed': seed, 'animals': animals, 'trees': trees, 'map': simmap}
+
+def run_mode(batch=False, breakdown=False):
+    """Names how seeds are run: in a batch JVM, in fresh JVMs, or in fresh JVMs through the
+    timed launcher of breakdown. Times from different modes do not compare.
+    """
+    return 'batch' if batch else 'timed' if breakdown else 'fresh'
+
+def make_runner(jobs=1, batch=False, timeout=0, retries=0, cachedir='', cachesize=64,
+                jvmopts=(), isolate=False, breakdown=False):
+    """Builds the function a pool of jobs workers calls to run one (n, Simulator arguments) job;
+    it returns n together with the parsed result. The options are those of run_tasks.
+    Returns (runner, jobs, close): jobs is lowered to the number of physical cores with
+    isolate, and close() stops the batch JVMs and trims the cache once the runner is done.
+    Every result is stamped with the run_mode it was measured in.
+    """
+    pinner = None
+    if isolate:
+        pinner = CorePinner()
+        jobs = min(jobs, len(pinner.cores))
+    batchrunner = BatchRunner(timeout, jvmopts, pinner) if batch else None
+    runner = batchrunner or functools.partial(run_seed, timeout=timeout, jvmopts=jvmopts, pinner=pinner,
+                                              timed=breakdown)
+    if retries > 0:
+        runner = RetryRunner(runner, retries)
+    cache = None
+    if cachedir != '':
+        cache = ResultCache(cachedir, class_hash(), int(cachesize*1024*1024))
+        mode = ' '.join(['batch' if batch else 'fresh'] + (['timed'] if breakdown else []) + list(jvmopts))
+        runner = CachedRunner(cache, runner, mode)
+    def run(job):
+        (n, result) = runner(job)
+        result['mode'] = run_mode(batch, breakdown)
+        return (n, result)
+    def close():
+        if batchrunner:
+            batchrunner.close()
+        if cache:
+            cache.evict()
+    return (run, jobs, close)
+
+def interruptible(results):
+    """Yields the results of a pool iterator, waking up every second to wait again.
+    Python 2 cannot interrupt a wait without a timeout, so Ctrl-C would go unnoticed.
+    """
+    while True:
+        try:
+            yield results.next(1.0)
+        except StopIteration:
+            return
+        except multiprocessing.TimeoutError:
+            pass
+
+def run_tasks(tasks, jobs=1, batch=False, timeout=0, retries=0, cachedir='', cachesize=64,
+              roundsize=0, converged=None, estimate=None, jvmopts=(), isolate=False, breakdown=False):
+    """Simulates every task made by seed_task on a pool of jobs workers.
+    Yields one record per task as soon as it finishes: the task's fields, its position
+    in tasks under 'task' and its parsed result.
+    With converged, tasks run roundsize at a time and no new round is started once
+    converged() returns True.
+    With estimate, a function from a task to its expected duration, each round is
+    dispatched longest task first so that no worker is left with a long task at the end.
+    jvmopts are extra options for every JVM started.
+    With isolate, each worker is pinned to a physical core of its own and there are
+    never more workers than physical cores.
+    With breakdown, fresh JVMs also record how long they took to start up.
+    """
+    (runner, jobs, close) = make_runner(jobs, batch, timeout, retries, cachedir, cachesize,
+                                        jvmopts, isolate, breakdown)
+    simjobs = [(n, sim_args(t['naturalist'], t['seed'], t['animals'], t['trees'], t['map']))
+               for (n, t) in enumerate(tasks)]
+    if roundsize <= 0:
+        roundsize = max(1, len(simjobs))
+    pool = ThreadPool(jobs)
+    try:
+        for start in range(0, len(simjobs), roundsize):
+            batchjobs = simjobs[start:start+roundsize]
+            if estimate is not None:
+                batchjobs.sort(key=lambda job: -estimate(tasks[job[0]]))
+            for (n, result) in interruptible(pool.imap_unordered(runner, batchjobs)):
+                record = dict(tasks[n])
+                record['task'] = n
+                record.update(result)
+                yield record
+            if converged is not None and converged():
+                break
+        pool.close()
+        pool.join()
+    finally:
+        kill_all()
+        pool.terminate()
+        close()
+
+def run(naturalist, num=100, animals=40, trees=70, simmap='', **kwargs):
+    """Simulates seeds 0 to num-1 of one naturalist, yielding a record per seed as it finishes.
+    Takes the same keyword arguments as run_tasks.
+    """
+    return run_tasks([seed_task(naturalist, i, animals, trees, simmap) for i in range(num)], **kwargs)
+
+class Coordinator(object):
+    """Hands out shards of tasks to scorer workers over TCP and collects their records.
+    The protocol is one JSON object per line. A worker asks for work with {"want": n}
+    and is answered with {"tasks": [[index, task], ...]}, {"wait": seconds} while other
+    workers still hold the last tasks, or {"done": true}. It reports each finished task
+    with {"n": index, "record": record}. Tasks held by a worker that disconnects are
+    handed out again, and a task finished twice is only counted once.
+    """
+
+    def __init__(self, tasks, address, converged=None, estimate=None):
+        self.tasks = tasks
+        self.converged = converged
+        order = list(range(len(tasks)))
+        if estimate is not None:
+            order.sort(key=lambda n: -estimate(tasks[n]))
+        self.pending = collections.deque(order)
+        self.inflight = set()
+        self.finished = set()
+        self.stopped = False
+        self.ended = False
+        self.lock = threading.Lock()
+        self.active = 0
+        self.records = Queue()
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(address)
+        self.server.listen(16)
+
+    def serve(self):
+        """Accepts workers until the run is over"""
+        while True:
+            try:
+                (conn, addr) = self.server.accept()
+            except (socket.error, OSError):
+                return
+            handler = threading.Thread(target=self.handle, args=(conn,))
+            handler.daemon = True
+            handler.start()
+
+    def over(self):
+        """True once nothing is out with a worker and nothing more will be handed out"""
+        return not self.inflight and (self.stopped or not self.pending)
+
+    def end_if_over(self):
+        """Ends the stream of records once the run is over. Called with the lock held."""
+        if not self.ended and self.over():
+            self.ended = True
+            self.records.put(None)
+
+    def take(self, want):
+        with self.lock:
+            if not self.stopped and self.converged is not None and self.converged():
+                self.stopped = True
+            if self.over():
+                self.end_if_over()
+                return None
+            shard = []
+            while self.pending and len(shard) < want and not self.stopped:
+                shard.append(self.pending.popleft())
+            self.inflight.update(shard)
+            return shard
+
+    def finish(self, n, record):
+        with self.lock:
+            if n in self.finished:
+                return
+            self.finished.add(n)
+            self.inflight.discard(n)
+            record['task'] = n
+            self.records.put(record)
+            self.end_if_over()
+
+    def handle(self, conn):
+        with self.lock:
+            self.active += 1
+        mine = set()
+        rfile = conn.makefile('r')
+        wfile = conn.makefile('w')
+        try:
+            for line in rfile:
+                msg = json.loads(line)
+                if 'record' in msg:
+                    mine.discard(msg['n'])
+                    self.finish(msg['n'], msg['record'])
+                if 'want' in msg:
+                    shard = self.take(max(1, msg['want']))
+                    if shard is None:
+                        reply = {'done': True}
+                    elif shard:
+                        mine.update(shard)
+                        reply = {'tasks': [[n, self.tasks[n]] for n in shard]}
+                    else:
+                        reply = {'wait': 1.0}
+                    wfile.write(json.dumps(reply) + '\n')
+                    wfile.flush()
+        except (socket.error, IOError, ValueError):
+            pass
+        finally:
+            with self.lock:
+                for n in mine:
+                    if n in self.inflight:
+                        self.inflight.discard(n)
+                        self.pending.appendleft(n)
+                self.end_if_over()
+                self.active -= 1
+            conn.close()
+
+    def close(self, grace=3.0):
+        """Stops accepting workers, then gives the connected ones up to grace seconds
+        to come back for work and be told that the run is over.
+        """
+        self.server.close()
+        start = timer()
+        while self.active > 0 and timer() - start < grace:
+            sleep(0.05)
+
+def serve_tasks(tasks, address, roundsize=0, converged=None, estimate=None):
+    """Like run_tasks, but the tasks are simulated by workers connecting to address.
+    With converged, no new shard is handed out once converged() returns True.
+    With estimate, shards are handed out longest task first.
+    """
+    if not tasks:
+        return
+    coordinator = Coordinator(tasks, address, converged, estimate)
+    server = threading.Thread(target=coordinator.serve)
+    server.daemon = True
+    server.start()
+    try:
+        while True:
+            record = coordinator.records.get()
+            if record is None:
+                break
+            yield record
+    finally:
+        coordinator.close()
+
+def work(address, jobs=1, patience=60.0, **kwargs):
+    """Runs shards of tasks from the coordinator at address on this machine's cores,
+    reconnecting whenever the connection fails, until the coordinator says the run is over.
+    Gives up after patience seconds without being able to reach the coordinator.
+    kwargs are the run options of run_tasks; one pool, and with them one set of batch
+    JVMs and one cache, serves every shard the worker runs.
+    """
+    (runner, jobs, close) = make_runner(jobs, **kwargs)
+    pool = ThreadPool(jobs)
+    try:
+        lost = None
+        while True:
+            try:
+                conn = socket.create_connection(address)
+            except (socket.error, OSError):
+                if lost is None:
+                    lost = timer()
+                elif timer() - lost > patience:
+                    return False
+                sleep(1.0)
+                continue
+            lost = None
+            try:
+                if work_shards(conn, jobs, pool, runner):
+                    return True
+            except (socket.error, IOError, ValueError):
+                pass
+            finally:
+                conn.close()
+            sleep(1.0)
+    finally:
+        kill_all()
+        pool.terminate()
+        close()
+
+def work_shards(conn, jobs, pool, runner):
+    """Asks for and runs shards over one connection, asking for the next shard as soon as
+    no more than jobs tasks are left, so the cores never wait for the slowest seed of a
+    shard. Returns True when the run is over.
+    """
+    rfile = conn.makefile('r')
+    wfile = conn.makefile('w')
+    cond = threading.Condition()
+    held = [0]
+    def run_job(job):
+        try:
+            return runner(job)
+        except Exception as e:
+            return (job[0], failed_result(str(e)))
+    def reporter(task):
+        def report(outcome):
+            (n, result) = outcome
+            record = dict(task)
+            record.update(result)
+            with cond:
+                held[0] -= 1
+                cond.notify()
+                try:
+                    wfile.write(json.dumps({'n': n, 'record': record}) + '\n')
+                    wfile.flush()
+                except (socket.error, IOError, ValueError):
+                    pass
+        return report
+    while True:
+        with cond:
+            while held[0] > jobs:
+                cond.wait()
+            wfile.write(json.dumps({'want': 2*jobs - held[0]}) + '\n')
+            wfile.flush()
+        line = rfile.readline()
+        if not line:
+            return False
+        reply = json.loads(line)
+        if reply.get('done'):
+            return True
+        if 'wait' in reply:
+            sleep(reply['wait'])
+            continue
+        for (n, t) in reply['tasks']:
+            with cond:
+                held[0] += 1
+            job = (n, sim_args(t['naturalist'], t['seed'], t['animals'], t['trees'], t['map']))
+            pool.apply_async(run_job, (job,), callback=reporter(t))
+
+class Durations(object):
+    """Wall time of every seed seen so far, remembered between runs in a JSON file.
+    Used to estimate how long a task will take; unknown tasks are assumed to take
+    the mean of the known ones.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.times = {}
+        if os.path.isfile(path):
+            try:
+                with open(path, 'r') as f:
+                    self.times = json.load(f)
+            except ValueError:
+                pass
+        self.default = scorestats.mean(list(self.times.values()))
+
+    def key(self, task):
+        return json.dumps(list(task_key(task)))
+
+    def estimate(self, task):
+        return self.times.get(self.key(task), self.default)
+
+    def track(self, records):
+        """Passes records through, remembering the wall time of each freshly run seed,
+        and saves the file once they have all gone by. Cached and resumed records come
+        from earlier runs and are left out.
+        """
+        for r in records:
+            if 'wall' in r and not r.get('cached') and not r.get('resumed') and 'error' not in r:
+                self.times[self.key(r)] = r['wall']
+            yield r
+        self.save()
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.times, f)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(tmp, self.path)
+
+def profile_seed(task, path, jvmopts=()):
+    """Runs one task again with Java Flight Recorder writing a recording to path.
+    Returns the parsed result of the run.
+    """
+    jfr = '-XX:StartFlightRecording=settings=profile,dumponexit=true,filename=' + path
+    simargs = sim_args(task['naturalist'], task['seed'], task['animals'], task['trees'], task['map'])
+    return run_seed((task['seed'], simargs), jvmopts=list(jvmopts) + [jfr])[1]
+
+def hot_methods(path, top=5):
+    """Returns the top methods of the execution samples in a JFR recording as
+    (method, share of all samples) pairs, or None if the jfr tool is not available.
+    """
+    try:
+        proc = subprocess.Popen(['jfr', 'print', '--events', 'jdk.ExecutionSample', path],
+                                stdout=subprocess.PIPE, universal_newlines=True)
+    except OSError:
+        return None
+    counts = {}
+    top_frame = False
+    for line in proc.stdout:
+        line = line.strip()
+        if top_frame and line:
+            # e.g. MyNaturalist.exploreNode() line: 52
+            method = line.split(' line:')[0]
+            counts[method] = counts.get(method, 0) + 1
+        top_frame = line.startswith('stackTrace = [')
+    proc.wait()
+    total = float(sum(counts.values())) or 1.0
+    return [(m, n/total) for (m, n) in sorted(counts.items(), key=lambda x: -x[1])[:top]]
+
+def print_profiles(tasks, profiledir, jvmopts=()):
+    """Reruns each task with the flight recorder on, saving the recordings in profiledir,
+    and prints a short hot method summary for each.
+    """
+    if not os.path.isdir(profiledir):
+        os.makedirs(profiledir)
+    for task in tasks:
+        path = os.path.join(profiledir, '%s-seed%d.jfr' % (task['naturalist'], task['seed']))
+        result = profile_seed(task, path, jvmopts)
+        print("Profile of Simulation " + str(task['seed']) + " - Time: " + str(result['time']) + " ms, saved to " + path)
+        methods = hot_methods(path) if os.path.isfile(path) else None
+        if methods is None:
+            print("  No hot method summary (needs the jfr tool and a recording)")
+            continue
+        for (method, share) in methods:
+            print("  %5.1f%%  %s" % (100*share, method))
+
+def cds_options(task, cdsdir, jvmopts=(), timeout=0):
+    """Returns the JVM options that start a JVM with the options jvmopts from a class data
+    sharing archive of the compiled classes. The archive is first built from one run of
+    task under jvmopts when there is none for these classes and options; a training run
+    still going after timeout seconds is killed. Archives of older classes are removed.
+    Returns no options if the JVM could not build an archive.
+    """
+    prefix = 'classes-%s-' % class_hash()[:16]
+    key = hashlib.sha1(' '.join(jvmopts).encode('utf-8')).hexdigest()[:8]
+    path = os.path.join(cdsdir, prefix + key + '.jsa')
+    if not os.path.isfile(path):
+        if not os.path.isdir(cdsdir):
+            os.makedirs(cdsdir)
+        for name in os.listdir(cdsdir):
+            if name.endswith('.jsa') and not name.startswith(prefix):
+                os.remove(os.path.join(cdsdir, name))
+        simargs = sim_args(task['naturalist'], task['seed'], task['animals'], task['trees'], task['map'])
+        try:
+            with open(os.devnull, 'w') as devnull:
+                proc = start_group(sim_command(simargs, list(jvmopts) + ['-XX:ArchiveClassesAtExit=' + path]),
+                                   stdout=devnull, stderr=devnull)
+                watchdog = Watchdog(proc, timeout)
+                proc.wait()
+                watchdog.cancel()
+            if watchdog.fired and os.path.isfile(path):
+                os.remove(path)
+        except OSError:
+            pass
+    if os.path.isfile(path):
+        return ['-XX:SharedArchiveFile=' + path]
+    return []
+
+def print_cds_savings(tasks, cdsopts, **kwargs):
+    """Runs tasks once without and once with the class data sharing options cdsopts and
+    prints the mean harness wall time the archive saves per seed.
+    kwargs are passed on to run_tasks; the result cache is never used.
+    """
+    kwargs['cachedir'] = ''
+    jvmopts = list(kwargs.pop('jvmopts', []))
+    walls = []
+    for opts in [jvmopts, jvmopts + cdsopts]:
+        walls.append(dict((r['task'], r['wall']) for r in run_tasks(tasks, jvmopts=opts, **kwargs) if 'wall' in r))
+    saved = [walls[0][n] - walls[1][n] for n in walls[0] if n in walls[1]]
+    plain = scorestats.mean(list(walls[0].values()))
+    print("CDS Archive: saves %.2f ms of wall time per seed (%.1f%%) over %d seeds" %
+          (scorestats.mean(saved), 100*scorestats.mean(saved)/plain if plain else 0.0, len(saved)))
+
+def print_calibration(task, runs, n, **kwargs):
+    """Runs one task runs times over and prints the spread of its time, which is the
+    run-to-run noise of the machine. n is the number of seeds behind the run's mean time,
+    used to turn that noise into the smallest difference in means worth believing.
+    kwargs are passed on to run_tasks; the result cache is never used.
+    """
+    kwargs['cachedir'] = ''
+    times = [r['time'] for r in run_tasks([task]*runs, **kwargs) if r['success']]
+    sd = scorestats.stdev(times)
+    m = scorestats.mean(times)
+    print("Calibration: Simulation %d run %d times - Mean Time: %.2f ms, Std Dev: %.2f ms (CV %.1f%%)" %
+          (task['seed'], len(times), m, sd, 100*sd/m if m else 0.0))
+    # Two runs of n seeds each differ by noise alone with std dev sqrt(2)*sd/sqrt(n)
+    floor = scorestats.normal_quantile(0.975)*sd*math.sqrt(2.0/max(n, 1))
+    print("Noise Floor: mean time differences under %.2f ms between runs like this one are within noise" % floor)
+
+# Option sets tried by 'tune' when no file of them is given
+TUNE_HEAPS = [[], ['-Xms256m', '-Xmx256m'], ['-Xms1g', '-Xmx1g']]
+TUNE_COLLECTORS = [[], ['-XX:+UseSerialGC'], ['-XX:+UseParallelGC']]
+TUNE_JITS = [[], ['-XX:TieredStopAtLevel=1']]
+
+def tune_configs(path=''):
+    """Returns the JVM option sets to try: one per line of the file path (the line
+    'default' meaning no options), or the TUNE_* grid if there is no file.
+    """
+    if path == '':
+        return [h + c + j for h in TUNE_HEAPS for c in TUNE_COLLECTORS for j in TUNE_JITS]
+    configs = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.split('#')[0].strip()
+            if line == 'default':
+                configs.append([])
+            elif line != '':
+                configs.append(line.split())
+    return configs
+
+def tune(naturalist, configs, seeds, halving=False, maxseeds=0, animals=40, trees=70, simmap='', cdsdir='', **kwargs):
+    """Times naturalist under every JVM option set in configs.
+    Without halving each set runs the same seeds. With halving, every round runs the
+    surviving sets on twice as many seeds as the last (up to maxseeds) and keeps the
+    faster half by median time, until one set is left. A set with failed or timed out
+    seeds ranks behind every set that ran all of its seeds, and a set none of whose seeds
+    succeeded takes no further part.
+    Returns (median, (ci low, ci high), mean, seeds, options, failed) for every set from
+    the last round it took part in, best first: sets that lasted more rounds rank higher,
+    then sets without failures, then lower median time. The statistics are over the seeds
+    that succeeded, and infinite when none did. With cdsdir, every set runs from a class
+    data sharing archive built under its own options. kwargs are passed on to run_tasks.
+    """
+    base = list(kwargs.pop('jvmopts', []))
+    kwargs['cachedir'] = ''
+    stats = {}
+    inf = float('inf')
+    alive = list(range(len(configs)))
+    n = seeds
+    while True:
+        tasks = [seed_task(naturalist, i, animals, trees, simmap) for i in range(n)]
+        for c in alive:
+            opts = base + configs[c]
+            if cdsdir != '':
+                opts = opts + cds_options(tasks[0], cdsdir, opts, kwargs.get('timeout', 0))
+            times = [r['time'] for r in run_tasks(tasks, jvmopts=opts, **kwargs) if r['success']]
+            if times:
+                stats[c] = (scorestats.median(times), scorestats.bootstrap_ci(times, stat=scorestats.median),
+                            scorestats.mean(times), len(times), configs[c], n - len(times))
+            else:
+                stats[c] = (inf, (inf, inf), inf, 0, configs[c], n)
+        alive = [c for c in alive if stats[c][3] > 0]
+        if not halving or len(alive) <= 1 or (maxseeds and n*2 > maxseeds):
+            break
+        alive = sorted(alive, key=lambda c: (stats[c][5] > 0, stats[c][0]))[:(len(alive)+1)//2]
+        n *= 2
+    return sorted(stats.values(), key=lambda st: (-(st[3] + st[5]), st[5] > 0, st[0]))
+
+def parse_address(v):
+    (host, port) = v.rsplit(':', 1)
+    return (host or 'localhost', int(port))
+
+def append_jsonl(records, path):
+    """Passes records through, appending each one to the JSONL file path as it goes by"""
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+            f.flush()
+            yield record
+
+def load_jsonl(path):
+    """Returns the records in the JSONL file path, skipping any line that was cut short"""
+    records = []
+    if not os.path.isfile(path):
+        return records
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass
+    return records
+
+def task_key(t):
+    return (t['naturalist'], t['seed'], t['animals'], t['trees'], t['map'])
+
+def checkpoint_setup(jvmopts=(), batch=False, breakdown=False):
+    """Describes what a checkpointed record was measured with: the JVM options, the
+    run_mode and the compiled classes
+    """
+    return {'jvmopts': ' '.join(jvmopts), 'mode': run_mode(batch, breakdown), 'classes': class_hash()}
+
+def run_checkpointed(tasks, path, resume=False, execute=run_tasks, setup=None, **kwargs):
+    """Like execute (run_tasks by default), but every record is appended to the JSONL file
+    path as it finishes, together with setup (see checkpoint_setup).
+    With resume, tasks that already have a record in path (other than an infrastructure
+    failure) are not run again; their stored records are yielded first instead, marked
+    'resumed' so that whatever records runs does not record them a second time.
+    Records stored with another setup, or before setups were stored, are run again.
+    """
+    index = dict((task_key(t), n) for (n, t) in enumerate(tasks))
+    stored = {}
+    if resume:
+        mismatched = set()
+        for r in load_jsonl(path):
+            key = task_key(r)
+            if key in index and 'error' not in r:
+                if r.get('setup') != setup:
+                    mismatched.add(key)
+                    continue
+                r['task'] = index[key]
+                r['resumed'] = True
+                stored[key] = r
+        mismatched -= set(stored)
+        if mismatched:
+            print("Note: %d seeds in %s were run with other JVM options, mode or classes; running them again" %
+                  (len(mismatched), path))
+    for r in sorted(stored.values(), key=lambda r: r['task']):
+        yield r
+    remaining = [t for t in tasks if task_key(t) not in stored]
+    if remaining:
+        def renumbered(records):
+            # Positions in the remaining tasks are mapped back to the full task list
+            for r in records:
+                r['task'] = index[task_key(r)]
+                r['setup'] = setup
+                yield r
+        for r in append_jsonl(renumbered(execute(remaining, **kwargs)), path):
+            yield r
+
+class Progress(object):
+    """Compact live view of a run: one status line redrawn in place on stream.
+    When stream is not a terminal a fresh line is written every few seconds instead.
+    jobs is the number of seeds running at once; when it is not known (None), as when
+    remote workers run the seeds, the ETA comes from the observed rate alone.
+    """
+
+    def __init__(self, total, jobs, stream=sys.stderr):
+        self.total = total
+        self.jobs = jobs
+        self.stream = stream
+        self.tty = hasattr(stream, 'isatty') and stream.isatty()
+        self.interval = 0.2 if self.tty else 5.0
+        self.start = timer()
+        self.last = 0
+        self.done = 0
+        self.negs = 0
+        self.times = []
+        self.walls = []
+
+    def update(self, record):
+        self.done += 1
+        if record['score'] < 0:
+            self.negs += 1
+        if record['success']:
+            self.times.append(record['time'])
+        if 'wall' in record and not record.get('cached'):
+            self.walls.append(record['wall'])
+        now = timer()
+        if now - self.last >= self.interval or self.done == self.total:
+            self.last = now
+            self.draw(now - self.start)
+
+    def draw(self, elapsed):
+        rate = self.done/elapsed if elapsed > 0 else 0.0
+        left = self.total - self.done
+        # Seeds left times the observed seed duration, shared between the workers
+        if self.walls and self.jobs:
+            eta = left*scorestats.mean(self.walls)/1000.0/self.jobs
+        else:
+            eta = left/rate if rate > 0 else 0.0
+        (lo, hi) = scorestats.mean_ci(self.times)
+        line = ('%d/%d seeds  %.1f/s  mean %.1f ms [%.1f, %.1f]  median %.1f ms  neg %d  eta %s' %
+                (self.done, self.total, rate, scorestats.mean(self.times), lo, hi,
+                 scorestats.median(self.times), self.negs, format_duration(eta)))
+        if self.tty:
+            self.stream.write('\r' + line + '\033[K')
+        else:
+            self.stream.write(line + '\n')
+        self.stream.flush()
+
+    def finish(self):
+        if self.tty:
+            self.stream.write('\n')
+            self.stream.flush()
+
+def format_duration(seconds):
+    (m, sec) = divmod(int(seconds), 60)
+    (h, m) = divmod(m, 60)
+    return '%d:%02d:%02d' % (h, m, sec)
+
+def show_progress(records, total, jobs):
+    """Passes records through, keeping a Progress view up to date as they go by"""
+    view = Progress(total, jobs)
+    for r in records:
+        view.update(r)
+        yield r
+    view.finish()
+
+def parse_values(v, conv=int):
+    """Parses a comma separated list of values for a sweep.
+    Numeric items may be inclusive ranges written start:stop or start:stop:step.
+    """
+    values = []
+    for item in v.split(','):
+        item = item.strip()
+        if conv is int and ':' in item:
+            bounds = [int(x) for x in item.split(':')]
+            step = bounds[2] if len(bounds) > 2 else 1
+            values.extend(range(bounds[0], bounds[1]+1, step))
+        else:
+            values.append(conv(item))
+    return values
+
+def group_sweep(records, grid):
+    """Groups sweep records by their (map, animals, trees) point.
+    Returns a list of (point, results) in grid order, results being (seed, record) pairs.
+    """
+    groups = dict((point, []) for point in grid)
+    for r in records:
+        groups[(r['map'], r['animals'], r['trees'])].append((r['seed'], r))
+    return [(point, sorted(groups[point], key=lambda x: x[0])) for point in grid]
+
+SWEEP_COLUMNS = ['map', 'animals', 'trees', 'seeds', 'score', 'moves', 'time', 'median', 'p90', 'cilow', 'cihigh']
+
+def sweep_table(sweep):
+    """Returns one row of SWEEP_COLUMNS per sweep point"""
+    rows = []
+    for ((m, a, t), results) in sweep:
+        done = [r for (seed, r) in results if r['success']]
+        times = [r['time'] for r in done]
+        (lo, hi) = scorestats.bootstrap_ci(times)
+        rows.append([m or 'random', a, t, len(done),
+                     scorestats.mean([r['score'] for r in done]),
+                     scorestats.mean([r['moves'] for r in done]),
+                     scorestats.mean(times), scorestats.median(times),
+                     scorestats.percentile(times, 90), lo, hi])
+    return rows
+
+def format_cell(x):
+    if isinstance(x, float):
+        return '%.2f' % x
+    return str(x)
+
+def average(total, count):
+    if count == 0:
+        return 0.0
+    return float(total)/count
 
 if __name__ == '__main__':
     parser = optparse.OptionParser()
     (opts, args) = parser.parse_args()
     if len(args) == 0:
-        print "ERROR!!!"
+        print("ERROR!!!")
+    # A worker takes its naturalists from the coordinator, so its options come first
+    if len(args) > 0 and args[0].startswith('worker='):
+        args.insert(0, '')
 
     sim = 100
-    animals = 40
-    trees = 70
-    simmap = ''
+    animals = [40]
+    trees = [70]
+    simmap = ['']
     print_neg = False
+    jobs = 1
+    batch = False
+    print_warm = False
+    cachedir = ''
+    cachesize = 64
+    other = ''
+    table = ''
+    precision = 0.0
+    confidence = 95.0
+    minseeds = 10
+    timeout = 0.0
+    retries = 0
+    jsonl = ''
+    resume = False
+    live = False
+    serve = ''
+    worker = ''
+    durations = None
+    store = ''
+    jvmopts = []
+    profile = 0
+    profiledir = 'profiles'
+    isolate = False
+    calibrate = -1
+    tuning = None
+    halving = False
+    history = scorehistory.HISTORY_FILE
+    cdsdir = ''
+    cdscheck = 5
+    breakdown = False
+    quick = 0
+    build = True
 
     for i in range(1,len(args)):
         arg = args[i].strip()
@@ -20,13 +1401,111 @@ if __name__ == '__main__':
             sim = int(v.strip())
         if arg.startswith('animals='):
             (k,v) = arg.split('=')
-            animals = int(v.strip())
+            animals = parse_values(v)
         if arg.startswith('trees='):
             (k,v) = arg.split('=')
-            trees = int(v.strip())
+            trees = parse_values(v)
         if arg.startswith('map='):
             (k,v) = arg.split('=')
-            simmap = v.strip()
+            simmap = parse_values(v, lambda m: '' if m == 'random' else m)
+        if arg.startswith('jobs='):
+            (k,v) = arg.split('=')
+            jobs = max(1, int(v.strip()))
+        if arg == 'batch':
+            batch = True
+        if arg == 'warmup':
+            batch = True
+            print_warm = True
+        if arg == 'cache':
+            cachedir = '.scorecache'
+        if arg.startswith('cache='):
+            (k,v) = arg.split('=')
+            cachedir = v.strip()
+        if arg.startswith('cachesize='):
+            (k,v) = arg.split('=')
+            cachesize = float(v.strip())
+        if arg.startswith('compare='):
+            (k,v) = arg.split('=')
+            other = v.strip()
+        if arg.startswith('table='):
+            (k,v) = arg.split('=')
+            table = v.strip()
+        if arg.startswith('precision='):
+            (k,v) = arg.split('=')
+            precision = float(v.strip().rstrip('%'))
+        if arg.startswith('confidence='):
+            (k,v) = arg.split('=')
+            confidence = float(v.strip().rstrip('%'))
+        if arg.startswith('minnum='):
+            (k,v) = arg.split('=')
+            minseeds = int(v.strip())
+        if arg.startswith('timeout='):
+            (k,v) = arg.split('=')
+            timeout = float(v.strip())
+        if arg.startswith('retries='):
+            (k,v) = arg.split('=')
+            retries = int(v.strip())
+        if arg.startswith('jsonl='):
+            (k,v) = arg.split('=')
+            jsonl = v.strip()
+        if arg == 'resume':
+            resume = True
+        if arg == 'progress':
+            live = True
+        if arg.startswith('serve='):
+            (k,v) = arg.split('=')
+            serve = v.strip()
+        if arg.startswith('worker='):
+            (k,v) = arg.split('=')
+            worker = v.strip()
+        if arg == 'lpt':
+            durations = Durations('.scoredurations.json')
+        if arg.startswith('lpt='):
+            (k,v) = arg.split('=')
+            durations = Durations(v.strip())
+        if arg.startswith('store='):
+            (k,v) = arg.split('=')
+            store = v.strip()
+        if arg == 'gclog':
+            jvmopts.append(GC_OPTION)
+        if arg.startswith('profile='):
+            (k,v) = arg.split('=')
+            profile = int(v.strip())
+        if arg.startswith('profiledir='):
+            (k,v) = arg.split('=')
+            profiledir = v.strip()
+        if arg == 'isolate':
+            isolate = True
+        if arg.startswith('calibrate='):
+            (k,v) = arg.split('=')
+            calibrate = int(v.strip())
+        if arg == 'tune':
+            tuning = ''
+        if arg.startswith('tune='):
+            (k,v) = arg.split('=')
+            tuning = v.strip()
+        if arg == 'halving':
+            halving = True
+        if arg.startswith('history='):
+            (k,v) = arg.split('=')
+            history = v.strip()
+        if arg == 'nohistory':
+            history = ''
+        if arg == 'cds':
+            cdsdir = '.scorecds'
+        if arg.startswith('cds='):
+            (k,v) = arg.split('=')
+            cdsdir = v.strip()
+        if arg.startswith('cdscheck='):
+            (k,v) = arg.split('=')
+            cdscheck = int(v.strip())
+        if arg == 'breakdown':
+            breakdown = True
+        if arg.startswith('quick='):
+            (k,v) = arg.split('=')
+            quick = int(v.strip())
+        if arg == 'nocompile':
+            build = False
         if arg.startswith('verbose'):
             print_neg = True
 
@@ -34,53 +1513,252 @@ if __name__ == '__main__':
     score = 0
     moves = 0
     time = 0
-    negs = []
-    negscore = []
-    for i in range(sim):
-        print 'Simulation ' + str(i)
-        simscript = 'java -cp bin;classes Simulator '
-        simscript += args[0]
-        simscript += ' --headless'
-        simscript += ' --seed='+str(i)
-        simscript += ' --nanimals='+str(animals)
-        simscript += ' --ntrees='+str(trees)
-        if (simmap != ''):
-            simscript += ' --map='+simmap
-
-        os.system(simscript + ' > output.txt')
-
-        f = open('output.txt', 'r')
+    coldtimes = []
+    warmtimes = []
+    results = []
+    otherresults = {}
+    grid = [(m, a, t) for m in simmap for a in animals for t in trees]
+    if resume and jsonl == '':
+        jsonl = 'scorer.jsonl'
+    runopts = {'jobs': jobs, 'batch': batch, 'timeout': timeout, 'retries': retries,
+               'cachedir': cachedir, 'cachesize': cachesize, 'jvmopts': jvmopts, 'isolate': isolate,
+               'breakdown': breakdown}
+    stale = stale_sources() if build else []
+    # The launchers batch and breakdown run seeds through are built on first use, even with nocompile
+    helpers = [name for (name, used) in [('BatchSimulator', batch), ('TimedSimulator', breakdown)]
+               if used and not os.path.isfile(os.path.join(BUILD_DIR, name + '.class'))]
+    stale += [path for path in [os.path.join(SOURCE_DIR, name + '.java') for name in helpers] if path not in stale]
+    if stale:
+        print("Compiling: " + ' '.join(os.path.basename(path) for path in stale))
+        (status, output) = compile_sources(stale)
+        if status is None and helpers:
+            print("ERROR: javac could not be run (" + output + ") to build " + ', '.join(helpers))
+            sys.exit(1)
+        if status is None:
+            print("WARNING: javac could not be run (" + output + "), using the classes as they are")
+        elif status != 0:
+            print(output.rstrip())
+            print("ERROR: compilation failed")
+            sys.exit(1)
+    cdsopts = []
+    if cdsdir != '' and worker == '' and serve == '':
+        # The archive options stay out of jvmopts so the history keeps one group per setup
+        (m, a, t) = grid[0]
+        cdsopts = cds_options(seed_task(args[0], 0, a, t, m), cdsdir, jvmopts, timeout)
+        runopts['jvmopts'] = jvmopts + cdsopts
+    if calibrate < 0:
+        # Isolation is about trustworthy timings, so it reports the noise by default
+        calibrate = 10 if isolate else 0
+    if worker != '':
+        sys.exit(0 if work(parse_address(worker), **runopts) else 1)
+    execute = run_tasks
+    # Seeds running at once, for the progress ETA; isolate runs at most one per physical core
+    workers = min(jobs, len(physical_cores())) if isolate else jobs
+    if serve != '':
+        # The workers bring their own jobs, batch, timeout, retries and cache options
+        execute = functools.partial(serve_tasks, address=parse_address(serve))
+        runopts = {}
+        workers = None
 
-        for line in f:
-            line = line.strip()
-            if line.startswith("Mission accomplished!"):
-                num += 1
-            if line.startswith('Score:'):
-                (k,v) = line.split()
-                v = v.strip()
-                score += int(v)
-                if int(v) < 0:
-                    negs.append(num-1)
-                    negscore.append(v)
-            if line.startswith('Moves:'):
-                (k,v) = line.split()
-                v = v.strip()
-                moves += int(v)
-            if line.startswith('Time elapsed:'):
-                (k1,k2,v,k3) = line.split()
-                v = v.strip()
-                time += int(v)
-
-        f.close()
-
-    print "Total Number of Simulations: " + str(num)
-    print "Average Score: " + str(float(score)/num)
-    print "Average Moves: " + str(float(moves)/num)
-    print "Average Time: " + str(float(time)/num)
-    print "Total Score: " + str(score)
-    print "Total Moves: " + str(moves)
-    print "Total Time: " + str(time)
-    print "Negative Trials: " + str(len(negs))
+    if tuning is not None:
+        (m, a, t) = grid[0]
+        # num= is the seed subset, or with halving the budget of the last round
+        seeds = max(2, sim//8) if halving else sim
+        ranking = tune(args[0], tune_configs(tuning), seeds, halving, sim, a, t, m,
+                       cdsdir if cdsopts else '', **dict(runopts, jvmopts=jvmopts))
+        print("%-4s %10s %21s %10s %6s %6s  %s" % ('Rank', 'Median', '95% CI', 'Mean', 'Seeds', 'Failed', 'JVM Options'))
+        for (rank, (med, (lo, hi), mean, n, opts, failed)) in enumerate(ranking):
+            print("%-4d %10.2f %10.2f - %8.2f %10.2f %6d %6d  %s" %
+                  (rank+1, med, lo, hi, mean, n, failed, ' '.join(opts) or 'default'))
+        if ranking[0][3] == 0:
+            print("ERROR: every seed failed under every set of JVM options")
+            sys.exit(1)
+        best = ranking[0][4]
+        print("Best JVM Options: " + (' '.join(best) or 'default'))
+        cmd = sim_command(sim_args(args[0], 0, a, t, m), jvmopts + best)
+        print("Command: " + ' '.join(arg for arg in cmd if not arg.startswith('--seed=')))
+        sys.exit(0)
+
+    if quick > 0:
+        (m, a, t) = grid[0]
+        key = scorehistory.group_key({'naturalist': args[0], 'animals': a, 'trees': t, 'map': m,
+                                      'mode': run_mode(batch, breakdown), 'jvmopts': ' '.join(jvmopts)})
+        past = scorehistory.latest_run(scorehistory.load(history or scorehistory.HISTORY_FILE), key)
+        # num= is the full run being estimated
+        past = dict((seed, e) for (seed, e) in past.items() if seed < sim)
+        if len(past) < quick:
+            print("ERROR: quick needs a full run of at least %d seeds of this setup in the history; run it in full first" % quick)
+            sys.exit(1)
+        strata = scorehistory.quick_strata(past, quick)
+        picked = [seed for (size, seeds) in strata for seed in seeds]
+        records = execute([seed_task(args[0], seed, a, t, m) for seed in picked], **runopts)
+        if history != '':
+            records = scorehistory.record(records, history, jvmopts=jvmopts, quick=True)
+        fresh = dict((r['seed'], r) for r in records if r['success'])
+        print("Quick Bench: %d of %d seeds from %d clusters" % (len(picked), len(past), len(strata)))
+        failed = [seed for seed in picked if seed not in fresh]
+        if failed:
+            print("Failed Seeds (left out of the estimate): " + ', '.join(str(seed) for seed in failed))
+        strata = [(size, [seed for seed in seeds if seed in fresh]) for (size, seeds) in strata]
+        if [seeds for (size, seeds) in strata if not seeds]:
+            print("Note: %d clusters have no seed left and are missing from the estimate" %
+                  len([seeds for (size, seeds) in strata if not seeds]))
+        strata = [(size, seeds) for (size, seeds) in strata if seeds]
+        if not strata:
+            print("ERROR: every picked seed failed, so there is nothing to estimate from")
+            sys.exit(1)
+        single = len([seeds for (size, seeds) in strata if len(seeds) == 1 and size > 1])
+        if single:
+            print("Note: %d clusters ran a single seed; their spread is pooled from the other clusters" % single)
+        for (name, label) in [('time', 'Time'), ('moves', 'Moves'), ('score', 'Score')]:
+            stored = [e[name] for e in past.values()]
+            # The change the subset shows against its own stored results is carried over to
+            # all stored seeds, which cancels most of the subset's own bias
+            (delta, interval, x) = scorestats.stratified_mean(
+                [(size, [fresh[seed][name] - past[seed][name] for seed in seeds]) for (size, seeds) in strata])
+            (x, y, now) = scorestats.stratified_mean([(size, [fresh[seed][name] for seed in seeds]) for (size, seeds) in strata])
+            (x, y, before) = scorestats.stratified_mean([(size, [past[seed][name] for seed in seeds]) for (size, seeds) in strata])
+            mean = scorestats.mean(stored) + delta
+            sd = scorestats.stdev(stored)*(now/before if before else 1.0)
+            if interval is None:
+                ci = "95% CI: unknown, no cluster ran two seeds"
+            else:
+                ci = "95%% CI: %.2f - %.2f" % (mean-delta+interval[0], mean-delta+interval[1])
+            print("Estimated Mean %s: %.2f (%s), Std Dev: %.2f, Total: %.0f" % (label, mean, ci, sd, mean*len(past)))
+            print("  Stored Mean %s: %.2f over %d seeds, change on the subset: %+.2f" %
+                  (label, scorestats.mean(stored), len(past), delta))
+        sys.exit(0)
+
+    if len(grid) > 1:
+        tasks = [seed_task(args[0], i, a, t, m) for (m, a, t) in grid for i in range(sim)]
+        if durations:
+            runopts['estimate'] = durations.estimate
+        if jsonl != '':
+            records = run_checkpointed(tasks, jsonl, resume, execute,
+                                       checkpoint_setup(runopts.get('jvmopts', jvmopts), batch, breakdown), **runopts)
+        else:
+            records = execute(tasks, **runopts)
+        if durations:
+            records = durations.track(records)
+        if store != '':
+            records = scoretable.ResultTable().collect(records, store)
+        if history != '':
+            records = scorehistory.record(records, history, jvmopts=jvmopts)
+        if live:
+            records = show_progress(records, len(tasks), workers)
+        rows = sweep_table(group_sweep(records, grid))
+        print('\t'.join(SWEEP_COLUMNS))
+        for row in rows:
+            print('\t'.join(format_cell(x) for x in row))
+        if table != '':
+            with open(table, 'w') as f:
+                f.write('\t'.join(SWEEP_COLUMNS) + '\n')
+                for row in rows:
+                    f.write('\t'.join(format_cell(x) for x in row) + '\n')
+        sys.exit(0)
+
+    (simmap, animals, trees) = grid[0]
+    names = [args[0]] + ([other] if other != '' else [])
+    # When comparing, the two naturalists alternate seed by seed (ABAB) so that
+    # any drift in the machine's speed hits both sides equally.
+    tasks = [seed_task(name, i, animals, trees, simmap) for i in range(sim) for name in names]
+
+    def converged():
+        """True once the mean time is known to within precision percent"""
+        times = [r['time'] for (seed, r) in results if r['success']]
+        if precision <= 0 or len(times) < minseeds:
+            return False
+        (lo, hi) = scorestats.mean_ci(times, confidence)
+        return (hi-lo)/2 <= scorestats.mean(times)*precision/100.0
+
+    # With a target precision, num= is only the budget: seeds run a round of
+    # jobs at a time until the confidence interval is tight enough.
+    roundsize = jobs*len(names) if precision > 0 else 0
+    if durations:
+        # Both sides of a seed get the same estimate, so sorting keeps them together
+        runopts['estimate'] = lambda t: sum(durations.estimate(dict(t, naturalist=name)) for name in names)
+    if jsonl != '':
+        records = run_checkpointed(tasks, jsonl, resume, execute,
+                                   checkpoint_setup(runopts.get('jvmopts', jvmopts), batch, breakdown),
+                                   roundsize=roundsize, converged=converged, **runopts)
+    else:
+        records = execute(tasks, roundsize=roundsize, converged=converged, **runopts)
+    if durations:
+        records = durations.track(records)
+    if store != '':
+        records = scoretable.ResultTable().collect(records, store)
+    if history != '':
+        records = scorehistory.record(records, history, jvmopts=jvmopts)
+    if live:
+        records = show_progress(records, len(tasks), workers)
+    # Seeds finish in any order; the totals are sums, so they come out exactly
+    # as they did when the seeds ran one after another.
+    for result in records:
+        i = result['seed']
+        if result['task'] % len(names) == 1:
+            otherresults[i] = result
+            continue
+        if not live:
+            if 'gccount' in result:
+                print('Simulation %d - Time: %d ms, GCs: %d, GC Pause: %.2f ms, Longest: %.2f ms' %
+                      (i, result['time'], result['gccount'], result['gcpause'], result['gcmax']))
+            elif breakdown and 'wall' in result:
+                startup = result.get('startup', 0.0)
+                print('Simulation %d - Wall: %.1f ms, Startup: %.1f ms, Simulator: %d ms, Other: %.1f ms' %
+                      (i, result['wall'], startup, result['time'], result['wall']-startup-result['time']))
+            else:
+                print('Simulation ' + str(i))
+        results.append((i, result))
+        if result['success']:
+            num += 1
+        score += result['score']
+        moves += result['moves']
+        time += result['time']
+        if result['success'] and 'cold' in result:
+            (coldtimes if result['cold'] else warmtimes).append(result['time'])
+    results.sort(key=lambda x: x[0])
+    negs = [(seed, r['score']) for (seed, r) in results if r['score'] < 0]
+
+    print("Total Number of Simulations: " + str(num))
+    print("Average Score: " + str(average(score, num)))
+    print("Average Moves: " + str(average(moves, num)))
+    print_stats(results)
+    print("Total Score: " + str(score))
+    print("Total Moves: " + str(moves))
+    print("Total Time: " + str(time))
+    print("Negative Trials: " + str(len(negs)))
+    timeouts = [seed for (seed, r) in results if r.get('timeout')]
+    failures = [(seed, r['error']) for (seed, r) in results if 'error' in r]
+    if timeouts or timeout > 0:
+        print("Timed Out Trials: " + str(len(timeouts)))
+    if failures:
+        print("Failed Trials: " + str(len(failures)))
+    if cachedir != '':
+        print("Cached Results Used: " + str(len([r for (seed, r) in results if r.get('cached')])))
+    if precision > 0:
+        times = [r['time'] for (seed, r) in results if r['success']]
+        (lo, hi) = scorestats.mean_ci(times, confidence)
+        reached = (hi-lo)/2/max(scorestats.mean(times), 1e-9)*100
+        print("Precision: +/-%.2f%% at %g%% confidence after %d seeds (target %g%%%s)" %
+              (reached, confidence, len(results), precision, '' if converged() else ', budget exhausted'))
+    if print_warm:
+        print("Cold Runs: " + str(len(coldtimes)) + " - Average Time: " + str(average(sum(coldtimes), len(coldtimes))))
+        print("Warm Runs: " + str(len(warmtimes)) + " - Average Time: " + str(average(sum(warmtimes), len(warmtimes))))
+    if breakdown:
+        print_breakdown(results)
+    if cdsopts and cdscheck > 0:
+        print_cds_savings(tasks[:cdscheck*len(names)], cdsopts, **dict(runopts, jvmopts=jvmopts))
+    if calibrate > 0 and serve == '':
+        print_calibration(seed_task(args[0], 0, animals, trees, simmap), calibrate, len(results), **runopts)
+    if profile > 0:
+        slowest = sorted([r for (seed, r) in results if r['success']], key=lambda r: -r['time'])[:profile]
+        print_profiles(slowest, profiledir, jvmopts)
+    if other != '':
+        print_comparison(names, [(seed, a, otherresults[seed]) for (seed, a) in results if seed in otherresults])
     if print_neg:
-        for i in range(len(negs)):
-            print "Simulation " + str(negs[i]) + " - Score: " + str(negscore[i])
+        for (seed, v) in negs:
+            print("Simulation " + str(seed) + " - Score: " + str(v))
+        for seed in timeouts:
+            print("Simulation " + str(seed) + " - Timed out")
+        for (seed, error) in failures:
+            print("Simulation " + str(seed) + " - Failed: " + error)
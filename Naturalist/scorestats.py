@@ -0,0 +1,175 @@
+"""Statistics helpers for scorer.py
+
+Everything here works on plain lists of numbers, so it runs without any
+packages beyond the standard library."""
+from __future__ import division
+import math
+import random
+
+# Number of resamples used for bootstrap confidence intervals
+BOOTSTRAP_SAMPLES = 2000
+
+def mean(xs):
+    if len(xs) == 0:
+        return 0.0
+    return sum(xs)/len(xs)
+
+def percentile(xs, p):
+    """Returns the p-th percentile (0-100) of xs, interpolating between ranks"""
+    if len(xs) == 0:
+        return 0.0
+    xs = sorted(xs)
+    rank = (len(xs)-1)*p/100.0
+    lo = int(math.floor(rank))
+    hi = int(math.ceil(rank))
+    return xs[lo] + (xs[hi]-xs[lo])*(rank-lo)
+
+def median(xs):
+    return percentile(xs, 50)
+
+def stdev(xs):
+    """Returns the sample standard deviation of xs"""
+    if len(xs) < 2:
+        return 0.0
+    m = mean(xs)
+    return math.sqrt(sum((x-m)**2 for x in xs)/(len(xs)-1))
+
+def bootstrap_ci(xs, confidence=95, stat=mean, samples=BOOTSTRAP_SAMPLES, seed=0):
+    """Returns a (low, high) percentile bootstrap confidence interval for stat(xs).
+    The resampling uses its own fixed seed so reports are reproducible.
+    """
+    if len(xs) < 2:
+        m = stat(xs)
+        return (m, m)
+    rng = random.Random(seed)
+    n = len(xs)
+    stats = []
+    for i in range(samples):
+        stats.append(stat([xs[rng.randrange(n)] for j in range(n)]))
+    tail = (100-confidence)/2.0
+    return (percentile(stats, tail), percentile(stats, 100-tail))
+
+def outliers(pairs, k=1.5):
+    """Returns the (key, value) pairs whose value lies outside the Tukey fences,
+    k interquartile ranges beyond the first and third quartiles.
+    """
+    values = [v for (key, v) in pairs]
+    q1 = percentile(values, 25)
+    q3 = percentile(values, 75)
+    lo = q1 - k*(q3-q1)
+    hi = q3 + k*(q3-q1)
+    return [(key, v) for (key, v) in pairs if v < lo or v > hi]
+
+def summary(xs):
+    """Returns a dictionary with the usual summary statistics of xs"""
+    return {'n': len(xs), 'mean': mean(xs), 'median': median(xs),
+            'p90': percentile(xs, 90), 'p99': percentile(xs, 99),
+            'stdev': stdev(xs), 'min': min(xs) if xs else 0, 'max': max(xs) if xs else 0}
+
+def signed_rank_test(deltas):
+    """Wilcoxon signed-rank test that the paired differences deltas are centred on zero.
+    Uses the normal approximation with tie correction, so it wants a few dozen pairs.
+    Returns (z, p) where p is two-sided.
+    """
+    nonzero = [d for d in deltas if d != 0]
+    n = len(nonzero)
+    if n == 0:
+        return (0.0, 1.0)
+    order = sorted(range(n), key=lambda i: abs(nonzero[i]))
+    ranks = [0.0]*n
+    ties = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j+1 < n and abs(nonzero[order[j+1]]) == abs(nonzero[order[i]]):
+            j += 1
+        for k in range(i, j+1):
+            ranks[order[k]] = (i+j)/2.0 + 1
+        t = j-i+1
+        ties += t**3 - t
+        i = j+1
+    wplus = sum(r for (r, d) in zip(ranks, nonzero) if d > 0)
+    expected = n*(n+1)/4.0
+    var = n*(n+1)*(2*n+1)/24.0 - ties/48.0
+    if var <= 0:
+        return (0.0, 1.0)
+    z = (wplus-expected)/math.sqrt(var)
+    return (z, math.erfc(abs(z)/math.sqrt(2)))
+
+def normal_quantile(q):
+    """Returns the z value below which a standard normal variable falls with probability q"""
+    lo = -10.0
+    hi = 10.0
+    for i in range(100):
+        mid = (lo+hi)/2
+        if 0.5*math.erfc(-mid/math.sqrt(2)) < q:
+            lo = mid
+        else:
+            hi = mid
+    return (lo+hi)/2
+
+def mean_ci(xs, confidence=95):
+    """Returns a (low, high) normal approximation confidence interval for the mean of xs.
+    Much cheaper than bootstrap_ci, so it suits checks that run after every few seeds.
+    """
+    m = mean(xs)
+    if len(xs) < 2:
+        return (m, m)
+    half = normal_quantile(0.5 + confidence/200.0)*stdev(xs)/math.sqrt(len(xs))
+    return (m-half, m+half)
+
+def kmeans(points, k, iterations=50):
+    """Groups points (tuples of equal length) into at most k clusters with Lloyd's algorithm.
+    The starting centres are spread evenly over the points sorted by their first
+    coordinate, so the clustering is reproducible. Empty clusters are dropped.
+    Returns a list of (centre, [indices into points]) pairs.
+    """
+    order = sorted(range(len(points)), key=lambda i: points[i])
+    k = max(1, min(k, len(points)))
+    centres = [points[order[(2*j+1)*len(order)//(2*k)]] for j in range(k)]
+    members = []
+    for it in range(iterations):
+        members = [[] for c in centres]
+        for (i, p) in enumerate(points):
+            dists = [sum((a-b)**2 for (a, b) in zip(p, c)) for c in centres]
+            members[dists.index(min(dists))].append(i)
+        members = [m for m in members if m]
+        moved = [tuple(mean([points[i][d] for i in m]) for d in range(len(points[0]))) for m in members]
+        if moved == centres:
+            break
+        centres = moved
+    return list(zip(centres, members))
+
+def stratified_mean(strata, confidence=95):
+    """Estimates a population mean from a sample drawn stratum by stratum.
+    strata is a list of (stratum size, sampled values) pairs. A stratum with a single
+    value that was not sampled in full has no spread of its own, so it is given the
+    pooled within-stratum variance of the strata with two values or more.
+    Returns (mean, (low, high), standard deviation of the population); the interval
+    is None when no stratum has two values to pool.
+    Raises ValueError when there is no stratum, or a stratum has no values.
+    """
+    if not strata or not all(xs for (size, xs) in strata):
+        raise ValueError('stratified_mean needs at least one value in every stratum')
+    total = sum(size for (size, xs) in strata)
+    m = sum(size*mean(xs) for (size, xs) in strata)/total
+    within = [(len(xs)-1, stdev(xs)**2) for (size, xs) in strata if len(xs) > 1]
+    dof = sum(d for (d, v) in within)
+    pooled = sum(d*v for (d, v) in within)/dof if dof else None
+    var = 0.0
+    spread = 0.0
+    for (size, xs) in strata:
+        w = size/total
+        v = stdev(xs)**2
+        if len(xs) == 1 and size > 1:
+            if pooled is None:
+                var = None
+            else:
+                v = pooled
+        if var is not None:
+            var += w*w*(1 - len(xs)/size)*v/len(xs)
+        spread += w*(v + (mean(xs)-m)**2)
+    if var is None:
+        return (m, None, math.sqrt(spread))
+    half = normal_quantile(0.5 + confidence/200.0)*math.sqrt(var)
+    return (m, (m-half, m+half), math.sqrt(spread))
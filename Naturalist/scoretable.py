@@ -0,0 +1,334 @@
+"""Columnar store for scorer.py results
+
+A table keeps one array of doubles per field, so a million seeds take a few
+tens of megabytes. Text fields (naturalist and map) are stored as codes into
+a list of strings. A table file is a series of blocks, each one JSON header
+line followed by the raw bytes of every column; a run appends a block of its
+own seeds instead of rewriting the file.
+
+When NumPy is installed, group_by and join view the columns in place with
+numpy.frombuffer and work on whole columns at once; without it they fall
+back to plain Python loops, which take seconds per million rows.
+
+From the command line:
+    python scoretable.py results.tbl by=map,trees:20
+        Time, score and moves by map and by trees in buckets of 20.
+    python scoretable.py results.tbl join=other.tbl
+        Per-seed time difference between two stores."""
+from __future__ import print_function
+import sys
+import json
+import array
+import math
+import scorestats
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Fields kept for every seed; TEXT_FIELDS are stored as codes into a string list
+FIELDS = ['naturalist', 'map', 'seed', 'animals', 'trees', 'success', 'score', 'moves', 'time',
+          'wall', 'cpuuser', 'cpusys', 'rss', 'timeout', 'cached']
+TEXT_FIELDS = ['naturalist', 'map']
+# Fields that identify a seed when joining two tables
+JOIN_FIELDS = ['seed', 'animals', 'trees', 'map']
+# Summary percentiles, as in scorestats.summary
+PERCENTILES = [('median', 50), ('p90', 90), ('p99', 99)]
+# Beyond this many pairs the join report uses the normal approximation instead of the
+# bootstrap, which is as good there and does not take seconds
+BOOTSTRAP_LIMIT = 1000
+
+NAN = float('nan')
+
+class ResultTable(object):
+    """Seed records stored column by column"""
+
+    def __init__(self):
+        self.columns = dict((name, array.array('d')) for name in FIELDS)
+        self.strings = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.columns['seed'])
+
+    def code(self, s):
+        if s not in self.codes:
+            self.codes[s] = len(self.strings)
+            self.strings.append(s)
+        return self.codes[s]
+
+    def append(self, record):
+        for name in FIELDS:
+            v = record.get(name)
+            if name in TEXT_FIELDS:
+                v = self.code(v or '')
+            elif v is None:
+                v = NAN
+            self.columns[name].append(float(v))
+
+    def collect(self, records, path):
+        """Passes records through, adding each to the table, and appends them as a block
+        to the table file path at the end, even if the run is cut short. Records resumed
+        from a checkpoint were added by the run that made them, so they are passed
+        through without being added again.
+        """
+        start = len(self)
+        try:
+            for r in records:
+                if not r.get('resumed'):
+                    self.append(r)
+                yield r
+        finally:
+            if len(self) > start:
+                with open(path, 'ab') as f:
+                    self.write_block(f, start)
+
+    def values(self, name):
+        """Returns a column as a list, decoding text fields"""
+        col = self.columns[name]
+        if name in TEXT_FIELDS:
+            return [self.strings[int(c)] for c in col]
+        return col
+
+    def column(self, name):
+        """Returns a column as a NumPy array sharing the table's storage.
+        The table cannot grow while such a view is alive.
+        """
+        return numpy.frombuffer(self.columns[name], dtype=numpy.float64)
+
+    def write_block(self, f, start=0):
+        """Writes the rows from start on as one block to the open file f"""
+        header = {'fields': FIELDS, 'rows': len(self)-start, 'strings': self.strings,
+                  'byteorder': sys.byteorder}
+        f.write((json.dumps(header) + '\n').encode('utf-8'))
+        for name in FIELDS:
+            self.columns[name][start:].tofile(f)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            self.write_block(f)
+
+    @classmethod
+    def load(cls, path):
+        """Reads every block of the table file path. A last block cut short, as by a run
+        killed while writing it, is left out.
+        """
+        table = cls()
+        with open(path, 'rb') as f:
+            for line in iter(f.readline, b''):
+                block = {}
+                try:
+                    header = json.loads(line.decode('utf-8'))
+                    rows = header['rows']
+                    for name in header['fields']:
+                        col = array.array('d')
+                        col.fromfile(f, rows)
+                        if header['byteorder'] != sys.byteorder:
+                            col.byteswap()
+                        block[name] = col
+                except (EOFError, ValueError):
+                    break
+                codes = [table.code(s) for s in header['strings']]
+                for name in FIELDS:
+                    # Columns added since the block was written are filled with NaN
+                    col = block.get(name, array.array('d', [NAN])*rows)
+                    if name in TEXT_FIELDS and name in block and codes != list(range(len(codes))):
+                        col = array.array('d', [codes[int(c)] for c in col])
+                    table.columns[name].extend(col)
+        return table
+
+    def group_by(self, keys, fields=('time', 'score', 'moves')):
+        """Summarises fields over the successful seeds of each group.
+        A key written name:width groups a numeric field into buckets of that width.
+        Seeds with no value (NaN) for a key, such as wall or rss when the usage of the
+        process was unavailable, are left out.
+        Returns a sorted list of (group, {field: summary}) pairs.
+        """
+        if numpy is not None:
+            return self.group_by_columns(keys, fields)
+        success = self.columns['success']
+        names = [key.split(':')[0] for key in keys]
+        rows = [row for row in range(len(success)) if success[row] == 1 and
+                not any(math.isnan(self.columns[name][row]) for name in names)]
+        keycols = []
+        for key in keys:
+            (name, width) = (key.split(':') + [''])[:2]
+            values = self.values(name)
+            col = [values[row] for row in rows]
+            if width:
+                w = float(width)
+                col = [math.floor(v/w)*w for v in col]
+            keycols.append(col)
+        groups = {}
+        for (row, group) in zip(rows, zip(*keycols)):
+            groups.setdefault(group, []).append(row)
+        result = []
+        for group in sorted(groups):
+            rows = groups[group]
+            result.append((group, dict((name, scorestats.summary([self.columns[name][r] for r in rows]))
+                                       for name in fields)))
+        return result
+
+    def group_by_columns(self, keys, fields):
+        """group_by on whole NumPy columns: every key column is turned into integer
+        levels, the levels are combined into one group code per row and the rows are
+        sorted by group code once, leaving each group a contiguous slice.
+        """
+        success = self.column('success') == 1
+        for key in keys:
+            success &= ~numpy.isnan(self.column(key.split(':')[0]))
+        code = numpy.zeros(int(success.sum()), dtype=numpy.int64)
+        levels = []
+        for key in keys:
+            (name, width) = (key.split(':') + [''])[:2]
+            col = self.column(name)[success]
+            if width:
+                w = float(width)
+                col = numpy.floor(col/w)*w
+            (values, level) = column_levels(col)
+            code = code*len(values) + level
+            levels.append((name, values))
+        (groups, inverse) = numpy.unique(code, return_inverse=True)
+        inverse = inverse.ravel()
+        order = numpy.argsort(inverse, kind='stable')
+        bounds = numpy.concatenate(([0], numpy.cumsum(numpy.bincount(inverse, minlength=len(groups)))))
+        columns = dict((name, self.column(name)[success][order]) for name in fields)
+        result = []
+        for (g, c) in enumerate(groups):
+            group = []
+            for (name, values) in reversed(levels):
+                v = float(values[c % len(values)])
+                group.insert(0, self.strings[int(v)] if name in TEXT_FIELDS else v)
+                c //= len(values)
+            result.append((tuple(group), dict((name, column_summary(col[bounds[g]:bounds[g+1]]))
+                                              for (name, col) in columns.items())))
+        result.sort(key=lambda x: x[0])
+        return result
+
+    def join_rows(self, other):
+        """Pairs up the successful seeds the two tables have in common, matching on JOIN_FIELDS.
+        Where a table holds a seed more than once its last record is used.
+        Returns the rows of the pairs in each table, ordered by seed key.
+        """
+        if numpy is None:
+            def index(table):
+                keys = zip(*[table.values(name) for name in JOIN_FIELDS])
+                success = table.columns['success']
+                return dict((key, row) for (row, key) in enumerate(keys) if success[row] == 1)
+            mine = index(self)
+            theirs = index(other)
+            common = sorted(key for key in mine if key in theirs)
+            return ([mine[key] for key in common], [theirs[key] for key in common])
+        # Text codes differ between tables, so both are mapped to ranks of the sorted strings
+        names = sorted(set(self.strings) | set(other.strings))
+        rank = dict((s, n) for (n, s) in enumerate(names))
+        def keycols(table):
+            cols = []
+            for name in JOIN_FIELDS:
+                col = table.column(name)
+                if name in TEXT_FIELDS:
+                    col = numpy.array([rank[s] for s in table.strings] or [0], dtype=numpy.float64)[col.astype(numpy.int64)]
+                cols.append(col)
+            return cols
+        (a, b) = (keycols(self), keycols(other))
+        code = numpy.zeros(len(self) + len(other), dtype=numpy.int64)
+        for (x, y) in zip(a, b):
+            (values, level) = column_levels(numpy.concatenate((x, y)))
+            code = code*len(values) + level
+        def last_rows(table, code):
+            rows = numpy.nonzero(table.column('success') == 1)[0]
+            # The first of each key in reverse order is the last record of that seed
+            (keys, first) = numpy.unique(code[rows][::-1], return_index=True)
+            return (keys, rows[::-1][first])
+        (mykeys, myrows) = last_rows(self, code[:len(self)])
+        (theirkeys, theirrows) = last_rows(other, code[len(self):])
+        (common, i, j) = numpy.intersect1d(mykeys, theirkeys, assume_unique=True, return_indices=True)
+        return (myrows[i], theirrows[j])
+
+    def paired(self, other, field='time'):
+        """Returns the lists of field values of the seeds paired up by join_rows, own first"""
+        (mine, theirs) = self.join_rows(other)
+        if numpy is not None:
+            return (self.column(field)[mine].tolist(), other.column(field)[theirs].tolist())
+        return ([self.columns[field][r] for r in mine], [other.columns[field][r] for r in theirs])
+
+    def join(self, other, field='time'):
+        """Pairs up the successful seeds the two tables have in common, matching on JOIN_FIELDS.
+        Where a table holds a seed more than once its last record is used. Returns a list of (seed key, own value, other value).
+        """
+        (mine, theirs) = self.join_rows(other)
+        keycols = [self.values(name) for name in JOIN_FIELDS]
+        return [(tuple(col[r] for col in keycols), self.columns[field][r], other.columns[field][t])
+                for (r, t) in zip(mine, theirs)]
+
+def column_levels(col):
+    """Numbers the distinct values of a NumPy array. Returns (values, level of every row),
+    where values[level] is the row's value. A column of integers not too far apart is
+    just offset by its minimum, which saves sorting it.
+    """
+    if len(col) and numpy.isfinite(col).all() and (col == numpy.floor(col)).all():
+        lo = col.min()
+        span = int(col.max() - lo) + 1
+        if span <= 4*len(col) + 1024:
+            return (numpy.arange(span) + lo, (col - lo).astype(numpy.int64))
+    (values, level) = numpy.unique(col, return_inverse=True)
+    return (values, level.ravel())
+
+def column_summary(xs):
+    """scorestats.summary of a NumPy array"""
+    if len(xs) == 0:
+        return scorestats.summary([])
+    st = {'n': len(xs), 'mean': float(xs.mean()), 'stdev': float(xs.std(ddof=1)) if len(xs) > 1 else 0.0,
+          'min': float(xs.min()), 'max': float(xs.max())}
+    for ((name, p), v) in zip(PERCENTILES, numpy.percentile(xs, [p for (name, p) in PERCENTILES])):
+        st[name] = float(v)
+    return st
+
+def bootstrap_mean_ci(xs, confidence=95):
+    """scorestats.bootstrap_ci of the mean, drawing all the resamples at once with NumPy"""
+    if numpy is None or len(xs) < 2:
+        return scorestats.bootstrap_ci(xs, confidence)
+    xs = numpy.asarray(xs, dtype=numpy.float64)
+    rng = numpy.random.RandomState(0)
+    means = xs[rng.randint(0, len(xs), (scorestats.BOOTSTRAP_SAMPLES, len(xs)))].mean(axis=1)
+    tail = (100-confidence)/2.0
+    return tuple(float(v) for v in numpy.percentile(means, [tail, 100-tail]))
+
+def format_key(v):
+    if isinstance(v, float) and v == int(v):
+        return str(int(v))
+    return str(v) or 'random'
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python scoretable.py FILE [by=field,field:width] [join=FILE]")
+        sys.exit(1)
+    table = ResultTable.load(sys.argv[1])
+    keys = ['naturalist', 'map']
+    other = ''
+    for arg in sys.argv[2:]:
+        if arg.startswith('by='):
+            keys = arg.split('=')[1].split(',')
+        if arg.startswith('join='):
+            other = arg.split('=')[1]
+
+    if other != '':
+        (mine, theirs) = table.paired(ResultTable.load(other))
+        deltas = [b - a for (a, b) in zip(mine, theirs)]
+        if len(deltas) > BOOTSTRAP_LIMIT:
+            (lo, hi) = scorestats.mean_ci(deltas)
+        else:
+            (lo, hi) = bootstrap_mean_ci(deltas)
+        print("Paired Seeds: " + str(len(deltas)))
+        print("Mean Delta: %.2f ms (95%% CI: %.2f - %.2f)" % (scorestats.mean(deltas), lo, hi))
+        print("Median Delta: %.2f ms" % scorestats.median(deltas))
+        sys.exit(0)
+
+    print('\t'.join(keys + ['seeds', 'time', 'median', 'p90', 'p99', 'score', 'moves']))
+    for (group, st) in table.group_by(keys):
+        cells = [format_key(g) for g in group]
+        cells.append(str(st['time']['n']))
+        cells.extend('%.2f' % st['time'][k] for k in ['mean', 'median', 'p90', 'p99'])
+        cells.append('%.2f' % st['score']['mean'])
+        cells.append('%.2f' % st['moves']['mean'])
+        print('\t'.join(cells))
@@ -0,0 +1,34 @@
+import java.io.BufferedReader;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+
+/** Runs many simulations inside one JVM for scorer.py.
+ * 	Each line read from standard input holds the Simulator arguments of one run.
+ * 	After every run a marker line is printed so the scorer knows the run is over.
+ */
+public class BatchSimulator {
+
+	public static final String DONE_MARKER = "Batch run finished.";
+
+	public static void main(String[] args) throws IOException {
+		PrintStream out = System.out; // Simulator may swap System.out while a run is going
+		BufferedReader in = new BufferedReader(new InputStreamReader(System.in));
+		String line;
+		while ((line = in.readLine()) != null) {
+			line = line.trim();
+			if (line.length() == 0) {
+				continue;
+			}
+			try {
+				Simulator.main(line.split("\\s+"));
+			} catch (Exception e) {
+				e.printStackTrace();
+			}
+			System.setOut(out);
+			out.println(DONE_MARKER);
+			out.flush();
+		}
+	}
+
+}
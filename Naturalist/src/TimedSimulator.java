@@ -0,0 +1,16 @@
+import java.io.IOException;
+
+/** Runs one simulation for scorer.py, announcing on standard output that main was reached.
+ * 	The scorer takes the moment the marker line arrives as the end of JVM startup.
+ */
+public class TimedSimulator {
+
+	public static final String START_MARKER = "Simulator started.";
+
+	public static void main(String[] args) throws IOException {
+		System.out.println(START_MARKER);
+		System.out.flush();
+		Simulator.main(args);
+	}
+
+}
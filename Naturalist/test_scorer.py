@@ -0,0 +1,49 @@
+"""Tests for the build step of scorer.py: python -m pytest test_scorer.py"""
+import os
+import shutil
+import tempfile
+import unittest
+import scorer
+
+class StaleSourcesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.src = os.path.join(self.root, 'src')
+        self.bin = os.path.join(self.root, 'bin')
+        os.makedirs(self.src)
+        os.makedirs(self.bin)
+        self.write('src/MyNaturalist.java', '/** A class */\npublic class MyNaturalist extends Naturalist {\n\tprivate class NodeData {}\n}\n', 100)
+        # Another MyNaturalist kept under a different file name, as JPS.java is
+        self.write('src/JPS.java', 'import java.util.*;\n\npublic class MyNaturalist extends Naturalist {\n}\n', 100)
+        self.write('bin/MyNaturalist.class', '', 200)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, text, mtime):
+        path = os.path.join(self.root, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        os.utime(path, (mtime, mtime))
+
+    def stale(self):
+        return [os.path.basename(p) for p in scorer.stale_sources(self.src, self.bin)]
+
+    def test_unchanged_tree_compiles_nothing(self):
+        self.assertEqual(self.stale(), [])
+
+    def test_changed_source_is_stale(self):
+        self.write('src/MyNaturalist.java', 'public class MyNaturalist extends Naturalist {}\n', 300)
+        self.assertEqual(self.stale(), ['MyNaturalist.java'])
+
+    def test_missing_class_is_stale(self):
+        self.write('src/BatchSimulator.java', 'public class BatchSimulator {}\n', 100)
+        self.assertEqual(self.stale(), ['BatchSimulator.java'])
+
+    def test_declared_class_ignores_comments(self):
+        self.write('src/Main.java', '// class Old\n/* public class Older */\npublic class Main {}\n', 100)
+        self.assertEqual(scorer.declared_class(os.path.join(self.src, 'Main.java')), ('Main', True))
+
+if __name__ == '__main__':
+    unittest.main()